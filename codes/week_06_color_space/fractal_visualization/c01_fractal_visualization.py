@@ -1,33 +1,43 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import random
-from matplotlib.path import Path
-import matplotlib.patches as patches
+from fractals import (
+    BARNSLEY_FERN,
+    ifs_density,
+    julia_grid,
+    koch_snowflake,
+    mandelbrot_grid,
+    sierpinski_levels,
+    subdivide_julia,
+    subdivide_mandelbrot,
+)
 
+# matplotlib is imported inside the plot functions, so importing this module
+# (from the benchmark, say) does not load it
 
-def mandelbrot(c, max_iter):
-    z = 0
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
+# Common parameters
+WIDTH, HEIGHT = 800, 800
+MAX_ITER = 100
 
 
-def plot_mandelbrot():
+def plot_mandelbrot(workers=1, shortcuts=True, subdivide=False, precision="auto"):
+    import matplotlib.pyplot as plt
+
     print("\nGenerating Mandelbrot Set...")
     xmin, xmax = -2.0, 1.0
     ymin, ymax = -1.5, 1.5
-    width, height = 800, 800
-    max_iter = 100
+    width, height = WIDTH, HEIGHT
+    max_iter = MAX_ITER
 
     x = np.linspace(xmin, xmax, width)
     y = np.linspace(ymin, ymax, height)
-    img = np.zeros((height, width))
-
-    for i in range(height):
-        for j in range(width):
-            img[i, j] = mandelbrot(x[j] + 1j * y[i], max_iter)
+    if subdivide:
+        img, evaluated = subdivide_mandelbrot(x, y, max_iter, shortcuts, symmetry=True)
+        print(f"Evaluated {evaluated} of {width * height} pixels")
+    else:
+        # Counts come back as uint8/uint16; float32 while the view is shallow.
+        # Only the lower half is computed, the upper one is its mirror image.
+        img = mandelbrot_grid(
+            x, y, max_iter, workers, shortcuts, precision, symmetry=True
+        )
 
     plt.figure(figsize=(10, 10))
     plt.imshow(img.T, cmap="hot", extent=[xmin, xmax, ymin, ymax])
@@ -38,29 +48,24 @@ def plot_mandelbrot():
     plt.show()
 
 
-def julia(c, z, max_iter):
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
+def plot_julia(workers=1, subdivide=False, precision="auto"):
+    import matplotlib.pyplot as plt
 
-
-def plot_julia():
     print("\nGenerating Julia Set...")
     c = -0.7 + 0.27j
     xmin, xmax = -1.5, 1.5
     ymin, ymax = -1.5, 1.5
-    width, height = 800, 800
-    max_iter = 100
+    width, height = WIDTH, HEIGHT
+    max_iter = MAX_ITER
 
     x = np.linspace(xmin, xmax, width)
     y = np.linspace(ymin, ymax, height)
-    img = np.zeros((height, width))
-
-    for i in range(height):
-        for j in range(width):
-            img[i, j] = julia(c, x[j] + 1j * y[i], max_iter)
+    if subdivide:
+        img, evaluated = subdivide_julia(c, x, y, max_iter, symmetry=True)
+        print(f"Evaluated {evaluated} of {width * height} pixels")
+    else:
+        # Point symmetric: half the square is the other half rotated by 180°
+        img = julia_grid(c, x, y, max_iter, workers, precision, symmetry=True)
 
     plt.figure(figsize=(10, 10))
     plt.imshow(img.T, cmap="magma", extent=[xmin, xmax, ymin, ymax])
@@ -71,126 +76,65 @@ def plot_julia():
     plt.show()
 
 
-def plot_sierpinski():
+def plot_sierpinski(degree=6):
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PolyCollection
+
     print("\nGenerating Sierpinski Triangle...")
 
     def sierpinski(points, degree, ax):
-        colormap = plt.cm.get_cmap("viridis")
-        colors = [colormap(i) for i in np.linspace(0, 1, degree)]
-
-        def draw_triangle(points, color):
-            triangle = plt.Polygon(points, fill=True, color=color)
-            ax.add_patch(triangle)
-
-        def get_mid(p1, p2):
-            return ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
-
-        def sierpinski_recursive(points, degree):
-            draw_triangle(points, colors[degree - 1])
-            if degree > 1:
-                sierpinski_recursive(
-                    [
-                        points[0],
-                        get_mid(points[0], points[1]),
-                        get_mid(points[0], points[2]),
-                    ],
-                    degree - 1,
-                )
-                sierpinski_recursive(
-                    [
-                        points[1],
-                        get_mid(points[0], points[1]),
-                        get_mid(points[1], points[2]),
-                    ],
-                    degree - 1,
-                )
-                sierpinski_recursive(
-                    [
-                        points[2],
-                        get_mid(points[2], points[1]),
-                        get_mid(points[0], points[2]),
-                    ],
-                    degree - 1,
-                )
-
-        sierpinski_recursive(points, degree)
+        # Every level is one (N, 3, 2) vertex array; all triangles go into a
+        # single collection, deeper levels drawn on top with their own color
+        colors = plt.get_cmap("viridis")(np.linspace(0, 1, degree))
+        levels = sierpinski_levels(points, degree)
+        sizes = [len(triangles) for triangles in levels]
+        facecolors = np.repeat(colors[::-1], sizes, axis=0)
+        collection = PolyCollection(
+            np.concatenate(levels), facecolors=facecolors, edgecolors="face"
+        )
+        ax.add_collection(collection, autolim=False)
 
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_aspect("equal")
     ax.axis("off")
 
     points = [(0, 0), (1, 0), (0.5, np.sqrt(3) / 2)]
-    sierpinski(points, 6, ax)
+    sierpinski(points, degree, ax)
     plt.title("Sierpinski Triangle")
     plt.show()
 
 
 def plot_koch_snowflake():
-    print("\nGenerating Koch Snowflake...")
+    import matplotlib.pyplot as plt
 
-    def koch_snowflake(order, scale=10):
-        def _koch_snowflake_complex(order):
-            if order == 0:
-                angles = np.array([0, 120, 240]) + 90
-                return scale * np.exp(np.deg2rad(angles) * 1j)
-            else:
-                ZR = 0.5 - 0.5j * np.sqrt(3) / 3
-                p1 = _koch_snowflake_complex(order - 1)
-                p2 = np.roll(p1, shift=-1)
-                dp = p2 - p1
-                new_points = np.empty(len(p1) * 4, dtype=np.complex128)
-                new_points[::4] = p1
-                new_points[1::4] = p1 + dp / 3
-                new_points[2::4] = p1 + dp * ZR
-                new_points[3::4] = p1 + dp / 3 * 2
-                return new_points
-
-        points = _koch_snowflake_complex(order)
-        x, y = points.real, points.imag
-        return x, y
+    print("\nGenerating Koch Snowflake...")
 
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_aspect("equal")
     ax.axis("off")
 
-    x, y = koch_snowflake(order=4)
+    points = 10 * koch_snowflake(order=4)  # cached per order by the package
+    x, y = points.real, points.imag
     ax.fill(x, y, facecolor="lightblue", edgecolor="navy")
     plt.title("Koch Snowflake")
     plt.show()
 
 
-def plot_barnsley_fern():
+def plot_barnsley_fern(n_points=10_000_000):
+    import matplotlib.pyplot as plt
+
     print("\nGenerating Barnsley Fern...")
 
-    def barnsley_fern(n_points):
-        x, y = [0], [0]
-
-        for _ in range(n_points):
-            r = random.random()
-            if r < 0.01:
-                xn = 0
-                yn = 0.16 * y[-1]
-            elif r < 0.86:
-                xn = 0.85 * x[-1] + 0.04 * y[-1]
-                yn = -0.04 * x[-1] + 0.85 * y[-1] + 1.6
-            elif r < 0.93:
-                xn = 0.2 * x[-1] - 0.26 * y[-1]
-                yn = 0.23 * x[-1] + 0.22 * y[-1] + 1.6
-            else:
-                xn = -0.15 * x[-1] + 0.28 * y[-1]
-                yn = 0.26 * x[-1] + 0.24 * y[-1] + 0.44
-
-            x.append(xn)
-            y.append(yn)
-
-        return x, y
+    # Hit counts of all walkers on a pixel grid instead of one scatter marker
+    # per point; shown on a log scale
+    bounds = (-2.5, 3.0, -0.5, 10.5)
+    density = ifs_density(BARNSLEY_FERN, n_points, (1100, 550), bounds)
 
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_aspect("equal")
     ax.axis("off")
 
-    x, y = barnsley_fern(100000)
-    ax.scatter(x, y, s=0.1, color="green", marker=".")
+    ax.imshow(np.log1p(density), cmap="Greens", extent=bounds)
     plt.title("Barnsley Fern")
     plt.show()
 
@@ -1,96 +1,106 @@
 import numpy as np
 import cv2
-import random
-import math
+from fractals import (
+    BARNSLEY_FERN,
+    antialias,
+    chaos_game,
+    colorize,
+    draw_koch,
+    ifs_density,
+    julia_grid,
+    linear_axis,
+    log_density,
+    mandelbrot_grid,
+    rasterize,
+    span,
+    subdivide_julia,
+    subdivide_mandelbrot,
+)
 
 # Common parameters
 WIDTH, HEIGHT = 800, 800
 MAX_ITER = 100
 
 
-def mandelbrot(c, max_iter):
-    z = 0
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
-
-
-def generate_mandelbrot():
+def generate_mandelbrot(
+    palette="hsv",
+    workers=1,
+    shortcuts=True,
+    subdivide=False,
+    antialiased=False,
+    aa_budget=None,
+):
     print("Generating Mandelbrot Set...")
     xmin, xmax = -2.0, 1.0
     ymin, ymax = -1.5, 1.5
-
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
-
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            cx = xmin + (xmax - xmin) * x / WIDTH
-            cy = ymin + (ymax - ymin) * y / HEIGHT
-            c = complex(cx, cy)
-            m = mandelbrot(c, MAX_ITER)
-
-            # Color mapping
-            hue = int(255 * m / MAX_ITER)
-            saturation = 255
-            value = 255 if m < MAX_ITER else 0
-
-            # Convert HSV to BGR
-            color = cv2.cvtColor(
-                np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR
-            )[0][0]
-            img[y, x] = color
-
-    # Scale up for better viewing
-    img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
-    cv2.imshow("Mandelbrot Set", img)
+    xs = linear_axis(xmin, xmax, WIDTH)
+    ys = linear_axis(ymin, ymax, HEIGHT)
+
+    with span("iterate"):
+        if subdivide:
+            counts, evaluated = subdivide_mandelbrot(
+                xs, ys, MAX_ITER, shortcuts, symmetry=True
+            )
+            print(f"Evaluated {evaluated} of {WIDTH * HEIGHT} pixels")
+        else:
+            counts = mandelbrot_grid(
+                xs, ys, MAX_ITER, workers, shortcuts, symmetry=True
+            )
+
+    # Color mapping
+    img = colorize(counts, MAX_ITER, palette)
+
+    # Smooth the set boundary: only pixels whose color differs from a
+    # neighbour are supersampled. aa_budget (seconds) caps the time spent,
+    # at the cost of leaving the weakest edges as they are.
+    if antialiased:
+        with span("antialias"):
+            done, edges = antialias(
+                img, "mandelbrot", None, xs, ys, MAX_ITER, palette,
+                shortcuts=shortcuts, symmetry=True, budget=aa_budget,
+            )
+        print(f"Anti-aliased {done} of {edges} edge pixels")
+    with span("imshow"):
+        cv2.imshow("Mandelbrot Set", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
 
-def julia(c, z, max_iter):
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
-
-
-def generate_julia():
+def generate_julia(
+    palette="hsv", workers=1, subdivide=False, antialiased=False, aa_budget=None
+):
     print("Generating Julia Set...")
     c = complex(-0.7, 0.27)
     xmin, xmax = -1.5, 1.5
     ymin, ymax = -1.5, 1.5
+    xs = linear_axis(xmin, xmax, WIDTH)
+    ys = linear_axis(ymin, ymax, HEIGHT)
 
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
-
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            zx = xmin + (xmax - xmin) * x / WIDTH
-            zy = ymin + (ymax - ymin) * y / HEIGHT
-            z = complex(zx, zy)
-            m = julia(c, z, MAX_ITER)
-
-            # Color mapping
-            hue = int(255 * m / MAX_ITER)
-            saturation = 255
-            value = 255 if m < MAX_ITER else 0
-
-            color = cv2.cvtColor(
-                np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR
-            )[0][0]
-            img[y, x] = color
-
-    img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
-    cv2.imshow("Julia Set", img)
+    with span("iterate"):
+        if subdivide:
+            counts, evaluated = subdivide_julia(c, xs, ys, MAX_ITER, symmetry=True)
+            print(f"Evaluated {evaluated} of {WIDTH * HEIGHT} pixels")
+        else:
+            counts = julia_grid(c, xs, ys, MAX_ITER, workers, symmetry=True)
+
+    # Color mapping
+    img = colorize(counts, MAX_ITER, palette)
+
+    if antialiased:
+        with span("antialias"):
+            done, edges = antialias(
+                img, "julia", c, xs, ys, MAX_ITER, palette, symmetry=True,
+                budget=aa_budget,
+            )
+        print(f"Anti-aliased {done} of {edges} edge pixels")
+    with span("imshow"):
+        cv2.imshow("Julia Set", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
 
-def generate_sierpinski():
+def generate_sierpinski(n_points=1_000_000):
     print("Generating Sierpinski Triangle...")
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
 
     # Define the three vertices of the triangle
     vertices = [
@@ -99,102 +109,37 @@ def generate_sierpinski():
         (WIDTH - 50, HEIGHT - 50),  # Bottom right
     ]
 
-    # Start from a random point
-    point = (random.randint(0, WIDTH), random.randint(0, HEIGHT))
-
-    for _ in range(50000):
-        # Choose a random vertex
-        vertex = random.choice(vertices)
-
-        # Move halfway from current point to vertex
-        point = ((point[0] + vertex[0]) // 2, (point[1] + vertex[1]) // 2)
-
-        # Draw the point
-        cv2.circle(img, point, 1, (0, 255, 0), -1)
+    # Many walkers each move halfway to a random vertex per step; the visited
+    # pixels are counted and drawn in one pass at the end
+    density = chaos_game(vertices, n_points, (HEIGHT, WIDTH), ratio=0.5)
+    img = rasterize(density, (0, 255, 0), dot_radius=1)
 
     cv2.imshow("Sierpinski Triangle", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
 
-def generate_koch_snowflake():
+def generate_koch_snowflake(depth=4):
     print("Generating Koch Snowflake...")
     img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
 
-    def koch_curve(p1, p2, depth):
-        p1 = (int(p1[0]), int(p1[1]))
-        p2 = (int(p2[0]), int(p2[1]))
-        if depth == 0:
-            cv2.line(img, p1, p2, (255, 255, 255), 1)
-        else:
-            dx = p2[0] - p1[0]
-            dy = p2[1] - p1[1]
-
-            # Calculate the 3 intermediate points
-            pA = (p1[0] + dx / 3, p1[1] + dy / 3)
-            pC = (p1[0] + 2 * dx / 3, p1[1] + 2 * dy / 3)
-
-            # Calculate the peak point (pB)
-            angle = math.atan2(dy, dx)
-            length = math.sqrt(dx**2 + dy**2) / 3
-            pBx = p1[0] + dx / 2 - length * math.sin(angle - math.pi / 3)
-            pBy = p1[1] + dy / 2 + length * math.cos(angle - math.pi / 3)
-            pB = (int(pBx), int(pBy))
-
-            # Recursively draw the 4 segments
-            koch_curve(p1, pA, depth - 1)
-            koch_curve(pA, pB, depth - 1)
-            koch_curve(pB, pC, depth - 1)
-            koch_curve(pC, p2, depth - 1)
-
-    # Define the initial triangle
-    center_x, center_y = WIDTH // 2, HEIGHT // 2
+    # The whole outline is one polyline, drawn with sub-pixel precision
+    center = (WIDTH // 2, HEIGHT // 2)
     size = 300
-
-    p1 = (center_x, center_y - size)
-    p2 = (center_x - int(size * math.sqrt(3) / 2), center_y + size // 2)
-    p3 = (center_x + int(size * math.sqrt(3) / 2), center_y + size // 2)
-
-    # Draw the snowflake
-    depth = 4  # Recursion depth
-    koch_curve(p1, p2, depth)
-    koch_curve(p2, p3, depth)
-    koch_curve(p3, p1, depth)
+    draw_koch(img, depth, center, size, (255, 255, 255))
 
     cv2.imshow("Koch Snowflake", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
 
-def generate_barnsley_fern():
+def generate_barnsley_fern(n_points=10_000_000):
     print("Generating Barnsley Fern...")
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
-
-    x, y = 0, 0
-
-    for _ in range(100000):
-        r = random.random()
-        if r < 0.01:
-            xn = 0
-            yn = 0.16 * y
-        elif r < 0.86:
-            xn = 0.85 * x + 0.04 * y
-            yn = -0.04 * x + 0.85 * y + 1.6
-        elif r < 0.93:
-            xn = 0.2 * x - 0.26 * y
-            yn = 0.23 * x + 0.22 * y + 1.6
-        else:
-            xn = -0.15 * x + 0.28 * y
-            yn = 0.26 * x + 0.24 * y + 0.44
-
-        # Scale and position the point
-        px = int(WIDTH * (xn + 3) / 6)
-        py = int(HEIGHT - HEIGHT * (yn + 2) / 10)
-
-        if 0 <= px < WIDTH and 0 <= py < HEIGHT:
-            img[py, px] = (0, 255, 0)  # Green color
 
-        x, y = xn, yn
+    # All walkers apply a randomly picked affine map per step; the hit counts
+    # are log tone mapped so the sparse tips stay visible next to the stem
+    density = ifs_density(BARNSLEY_FERN, n_points, (HEIGHT, WIDTH))
+    img = log_density(density, (0, 255, 0))  # Green color
 
     cv2.imshow("Barnsley Fern", img)
     cv2.waitKey(0)
@@ -1,104 +1,125 @@
 import numpy as np
 import cv2
-import random
-import math
-import time
+from fractals import (
+    BARNSLEY_FERN,
+    Pacer,
+    antialias,
+    chaos_game_batches,
+    colorize,
+    draw_koch,
+    ifs_batches,
+    julia_grid,
+    linear_axis,
+    log_density,
+    mandelbrot_grid,
+    progressive_julia,
+    progressive_mandelbrot,
+    rasterize,
+    subdivide_julia,
+    subdivide_mandelbrot,
+)
 
 # Common parameters
 WIDTH, HEIGHT = 800, 800
 MAX_ITER = 100
-
-def mandelbrot(c, max_iter):
-    z = 0
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
-
-def generate_mandelbrot(animate=False):
+PREVIEW_HZ = 30  # preview refresh rate of the animated mode
+
+def show_progressive(window, previews, palette):
+    # Coarse-to-fine preview, refreshed at most PREVIEW_HZ times per second;
+    # the last preview is the finished image. Returns None on ESC, and when
+    # there was no preview at all.
+    cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+    pacer = Pacer(PREVIEW_HZ)
+    counts = None
+    for counts in previews:
+        if pacer.due():
+            cv2.imshow(window, colorize(counts, MAX_ITER, palette))
+            if cv2.waitKey(1) == 27:  # ESC to exit early
+                cv2.destroyAllWindows()
+                return None
+    return counts
+
+def generate_mandelbrot(
+    animate=False,
+    palette="hsv",
+    workers=1,
+    shortcuts=True,
+    subdivide=False,
+    antialiased=False,
+    aa_budget=None,
+):
     print("Generating Mandelbrot Set...")
     xmin, xmax = -2.0, 1.0
     ymin, ymax = -1.5, 1.5
     
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    xs = linear_axis(xmin, xmax, WIDTH)
+    ys = linear_axis(ymin, ymax, HEIGHT)
     
     if animate:
-        cv2.namedWindow("Mandelbrot Set", cv2.WINDOW_NORMAL)
-    
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            cx = xmin + (xmax - xmin) * x / WIDTH
-            cy = ymin + (ymax - ymin) * y / HEIGHT
-            c = complex(cx, cy)
-            m = mandelbrot(c, MAX_ITER)
-            
-            hue = int(255 * m / MAX_ITER)
-            saturation = 255
-            value = 255 if m < MAX_ITER else 0
-            
-            color = cv2.cvtColor(np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR)[0][0]
-            img[y, x] = color
-            
-            if animate and x % 10 == 0 and y % 10 == 0:  # Update every 10 pixels for performance
-                display_img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
-                cv2.imshow("Mandelbrot Set", display_img)
-                if cv2.waitKey(1) == 27:  # ESC to exit early
-                    cv2.destroyAllWindows()
-                    return
-    
-    img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
+        previews = progressive_mandelbrot(xs, ys, MAX_ITER, shortcuts, symmetry=True)
+        counts = show_progressive("Mandelbrot Set", previews, palette)
+        if counts is None:
+            return
+    elif subdivide:
+        counts, evaluated = subdivide_mandelbrot(
+            xs, ys, MAX_ITER, shortcuts, symmetry=True
+        )
+        print(f"Evaluated {evaluated} of {WIDTH * HEIGHT} pixels")
+    else:
+        counts = mandelbrot_grid(
+            xs, ys, MAX_ITER, workers, shortcuts, symmetry=True
+        )
+    img = colorize(counts, MAX_ITER, palette)
+    if antialiased:
+        # aa_budget (seconds) caps the time, sharpest edges first
+        done, edges = antialias(
+            img, "mandelbrot", None, xs, ys, MAX_ITER, palette,
+            shortcuts=shortcuts, symmetry=True, budget=aa_budget,
+        )
+        print(f"Anti-aliased {done} of {edges} edge pixels")
     cv2.imshow("Mandelbrot Set", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-def julia(c, z, max_iter):
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
-
-def generate_julia(animate=False):
+def generate_julia(
+    animate=False,
+    palette="hsv",
+    workers=1,
+    subdivide=False,
+    antialiased=False,
+    aa_budget=None,
+):
     print("Generating Julia Set...")
     c = complex(-0.7, 0.27)
     xmin, xmax = -1.5, 1.5
     ymin, ymax = -1.5, 1.5
     
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    xs = linear_axis(xmin, xmax, WIDTH)
+    ys = linear_axis(ymin, ymax, HEIGHT)
     
     if animate:
-        cv2.namedWindow("Julia Set", cv2.WINDOW_NORMAL)
-    
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            zx = xmin + (xmax - xmin) * x / WIDTH
-            zy = ymin + (ymax - ymin) * y / HEIGHT
-            z = complex(zx, zy)
-            m = julia(c, z, MAX_ITER)
-            
-            hue = int(255 * m / MAX_ITER)
-            saturation = 255
-            value = 255 if m < MAX_ITER else 0
-            
-            color = cv2.cvtColor(np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR)[0][0]
-            img[y, x] = color
-            
-            if animate and x % 10 == 0 and y % 10 == 0:
-                display_img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
-                cv2.imshow("Julia Set", display_img)
-                if cv2.waitKey(1) == 27:
-                    cv2.destroyAllWindows()
-                    return
-    
-    img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
+        previews = progressive_julia(c, xs, ys, MAX_ITER, symmetry=True)
+        counts = show_progressive("Julia Set", previews, palette)
+        if counts is None:
+            return
+    elif subdivide:
+        counts, evaluated = subdivide_julia(c, xs, ys, MAX_ITER, symmetry=True)
+        print(f"Evaluated {evaluated} of {WIDTH * HEIGHT} pixels")
+    else:
+        counts = julia_grid(c, xs, ys, MAX_ITER, workers, symmetry=True)
+    img = colorize(counts, MAX_ITER, palette)
+    if antialiased:
+        done, edges = antialias(
+            img, "julia", c, xs, ys, MAX_ITER, palette, symmetry=True,
+            budget=aa_budget,
+        )
+        print(f"Anti-aliased {done} of {edges} edge pixels")
     cv2.imshow("Julia Set", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-def generate_sierpinski(animate=False):
+def generate_sierpinski(animate=False, n_points=1_000_000):
     print("Generating Sierpinski Triangle...")
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
     
     vertices = [
         (WIDTH // 2, 50),
@@ -106,121 +127,74 @@ def generate_sierpinski(animate=False):
         (WIDTH - 50, HEIGHT - 50),
     ]
     
-    point = (random.randint(0, WIDTH), random.randint(0, HEIGHT))
-    
     if animate:
         cv2.namedWindow("Sierpinski Triangle", cv2.WINDOW_NORMAL)
     
-    for i in range(50000):
-        vertex = random.choice(vertices)
-        point = ((point[0] + vertex[0]) // 2, (point[1] + vertex[1]) // 2)
-        cv2.circle(img, point, 1, (0, 255, 0), -1)
-        
-        if animate and i % 100 == 0:  # Update every 100 iterations
+    pacer = Pacer(PREVIEW_HZ)
+    batch_points = n_points // 100 if animate else n_points
+    batches = chaos_game_batches(
+        vertices, n_points, (HEIGHT, WIDTH), batch_points=batch_points
+    )
+    density = np.zeros((HEIGHT, WIDTH), dtype=np.uint32)
+    for density in batches:
+        if animate and pacer.due():
+            img = rasterize(density, (0, 255, 0), dot_radius=1)
             cv2.imshow("Sierpinski Triangle", img)
             if cv2.waitKey(1) == 27:
                 cv2.destroyAllWindows()
                 return
     
+    img = rasterize(density, (0, 255, 0), dot_radius=1)
     cv2.imshow("Sierpinski Triangle", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-def generate_koch_snowflake(animate=False):
+def generate_koch_snowflake(animate=False, depth=4):
     print("Generating Koch Snowflake...")
     img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
     
     if animate:
         cv2.namedWindow("Koch Snowflake", cv2.WINDOW_NORMAL)
     
-    def koch_curve(p1, p2, depth, animate_step=None):
-        p1 = (int(p1[0]), int(p1[1]))
-        p2 = (int(p2[0]), int(p2[1]))
-        if depth == 0:
-            cv2.line(img, p1, p2, (255, 255, 255), 1)
-            if animate and animate_step and animate_step[0] % 10 == 0:
-                cv2.imshow("Koch Snowflake", img)
-                cv2.waitKey(1)
-            animate_step[0] += 1
-        else:
-            dx = p2[0] - p1[0]
-            dy = p2[1] - p1[1]
-
-            pA = (p1[0] + dx / 3, p1[1] + dy / 3)
-            pC = (p1[0] + 2 * dx / 3, p1[1] + 2 * dy / 3)
-
-            angle = math.atan2(dy, dx)
-            length = math.sqrt(dx**2 + dy**2) / 3
-            pBx = p1[0] + dx / 2 - length * math.sin(angle - math.pi / 3)
-            pBy = p1[1] + dy / 2 + length * math.cos(angle - math.pi / 3)
-            pB = (int(pBx), int(pBy))
-
-            koch_curve(p1, pA, depth - 1, animate_step)
-            koch_curve(pA, pB, depth - 1, animate_step)
-            koch_curve(pB, pC, depth - 1, animate_step)
-            koch_curve(pC, p2, depth - 1, animate_step)
-
-    center_x, center_y = WIDTH // 2, HEIGHT // 2
+    center = (WIDTH // 2, HEIGHT // 2)
     size = 300
-
-    p1 = (center_x, center_y - size)
-    p2 = (center_x - int(size * math.sqrt(3) / 2), center_y + size // 2)
-    p3 = (center_x + int(size * math.sqrt(3) / 2), center_y + size // 2)
-
-    depth = 4
+    
     if animate:
-        animate_step = [0]
-        koch_curve(p1, p2, depth, animate_step)
-        koch_curve(p2, p3, depth, animate_step)
-        koch_curve(p3, p1, depth, animate_step)
-    else:
-        koch_curve(p1, p2, depth)
-        koch_curve(p2, p3, depth)
-        koch_curve(p3, p1, depth)
+        # One frame per order; every order is built from the previous one
+        for order in range(depth):
+            img[...] = 0
+            draw_koch(img, order, center, size, (255, 255, 255))
+            cv2.imshow("Koch Snowflake", img)
+            if cv2.waitKey(500) == 27:
+                cv2.destroyAllWindows()
+                return
+        img[...] = 0
+    draw_koch(img, depth, center, size, (255, 255, 255))
 
     cv2.imshow("Koch Snowflake", img)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-def generate_barnsley_fern(animate=False):
+def generate_barnsley_fern(animate=False, n_points=10_000_000):
     print("Generating Barnsley Fern...")
-    img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
     
     if animate:
         cv2.namedWindow("Barnsley Fern", cv2.WINDOW_NORMAL)
     
-    x, y = 0, 0
-    
-    for i in range(100000):
-        r = random.random()
-        if r < 0.01:
-            xn = 0
-            yn = 0.16 * y
-        elif r < 0.86:
-            xn = 0.85 * x + 0.04 * y
-            yn = -0.04 * x + 0.85 * y + 1.6
-        elif r < 0.93:
-            xn = 0.2 * x - 0.26 * y
-            yn = 0.23 * x + 0.22 * y + 1.6
-        else:
-            xn = -0.15 * x + 0.28 * y
-            yn = 0.26 * x + 0.24 * y + 0.44
-
-        px = int(WIDTH * (xn + 3) / 6)
-        py = int(HEIGHT - HEIGHT * (yn + 2) / 10)
-
-        if 0 <= px < WIDTH and 0 <= py < HEIGHT:
-            img[py, px] = (0, 255, 0)
-            
-            if animate and i % 100 == 0:  # Update every 100 points
-                cv2.imshow("Barnsley Fern", img)
-                if cv2.waitKey(1) == 27:
-                    cv2.destroyAllWindows()
-                    return
-
-        x, y = xn, yn
+    pacer = Pacer(PREVIEW_HZ)
+    batch_points = n_points // 100 if animate else n_points
+    batches = ifs_batches(
+        BARNSLEY_FERN, n_points, (HEIGHT, WIDTH), batch_points=batch_points
+    )
+    density = np.zeros((HEIGHT, WIDTH), dtype=np.uint32)
+    for density in batches:
+        if animate and pacer.due():
+            cv2.imshow("Barnsley Fern", log_density(density, (0, 255, 0)))
+            if cv2.waitKey(1) == 27:
+                cv2.destroyAllWindows()
+                return
 
-    cv2.imshow("Barnsley Fern", img)
+    cv2.imshow("Barnsley Fern", log_density(density, (0, 255, 0)))
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
@@ -1,70 +1,134 @@
-import numpy as np
-import cv2
-import random
-import math
 import os
+import time
+from fractals import (
+    EscapeState,
+    PngSink,
+    RenderCache,
+    TeeSink,
+    VideoSink,
+    circle_path,
+    julia_grid,
+    compact,
+    linear_axis,
+    overlay,
+    render_key,
+    render_path,
+    span,
+    subdivide_julia,
+)
+
+OUT_DIR = r"codes\week_06_color_space\fractal_visualization\out_frac_julia"
+CACHE_DIR = r"codes\week_06_color_space\fractal_visualization\render_cache"
+CHECKPOINT_SECONDS = 60.0  # at most this much sweep work is lost to a crash
+C = complex(-0.7, 0.27)
+XMIN, XMAX = -1.5, 1.5
+YMIN, YMAX = -1.5, 1.5
+
+
+def julia_counts(
+    MAX_ITER, WIDTH, HEIGHT, workers=1, state=None, cache=None, subdivide=False
+):
+    # state: the MAX_ITER sweep, which only adds the iterations since the
+    # previous frame. That is cheaper than subdividing every frame anew (for
+    # C at 300 px the whole sweep costs about one subdivided frame), so the
+    # two are not combined.
+    if state is not None and subdivide:
+        raise ValueError("subdivide renders single frames, not a state sweep")
+    if cache is not None:
+        key = render_key(
+            "julia", {"c": C}, (XMIN, XMAX, YMIN, YMAX), (HEIGHT, WIDTH), MAX_ITER,
+            subdivide=subdivide,
+        )
+        counts = cache.get(key)
+        if counts is not None:
+            return counts
+
+    xs = linear_axis(XMIN, XMAX, WIDTH)
+    ys = linear_axis(YMIN, YMAX, HEIGHT)
+    if state is not None:
+        # Only the iterations beyond the previous frame are computed
+        counts = state.advance(MAX_ITER, workers)
+    elif subdivide:
+        counts, evaluated = subdivide_julia(C, xs, ys, MAX_ITER)
+        print(f"Evaluated {evaluated} of {WIDTH * HEIGHT} pixels")
+    else:
+        counts = julia_grid(C, xs, ys, MAX_ITER, workers)
+
+    if cache is not None:
+        cache.put(key, compact(counts, MAX_ITER))
+    return counts
+
+
+def render_julia_frame(
+    MAX_ITER=100,
+    WIDTH=800,
+    HEIGHT=800,
+    palette="hsv",
+    workers=1,
+    state=None,
+    cache=None,
+    subdivide=False,
+):
+    import cv2  # only frames need it; julia_counts is NumPy only
+
+    # img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    logo_path = os.path.abspath(
+        r"codes\week_06_color_space\fractal_visualization\howsam.png"
+    )
+    with span("imread"):
+        img = cv2.imread(f"{logo_path}")
+    with span("resize"):
+        img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_CUBIC)
+    with span("iterate"):
+        counts = julia_counts(
+            MAX_ITER, WIDTH, HEIGHT, workers, state, cache, subdivide
+        )
 
+    # Color mapping; black (inside the set) leaves the logo visible
+    overlay(img, counts, MAX_ITER, palette)
+    return img
 
-def julia(c, z, max_iter):
-    n = 0
-    while abs(z) <= 2 and n < max_iter:
-        z = z * z + c
-        n += 1
-    return n
 
+def frame_repeat(MAX_ITER):
+    return max(1, 5 - MAX_ITER)  # 0,0,0,0,1,1,1,2,2,3,4,5,...
 
-def generate_julia(cnt=0, MAX_ITER=100, WIDTH=800, HEIGHT=800):
-    print(f"Generating Julia Set... ({MAX_ITER})")
 
-    p = r"codes\week_06_color_space\fractal_visualization\out_frac_julia"
-    p = os.path.abspath(p)
-    os.makedirs(p, exist_ok=True)
-    img_name = f"{p}/{cnt:04d}.png"
-    let_continue = False
-    if os.path.exists(img_name):
-        let_continue = True
-
-    if not let_continue:
-        c = complex(-0.7, 0.27)
-        xmin, xmax = -1.5, 1.5
-        ymin, ymax = -1.5, 1.5
-
-        # img = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
-        logo_path = os.path.abspath(
-            r"codes\week_06_color_space\fractal_visualization\howsam.png"
+def generate_julia(
+    cnt=0,
+    MAX_ITER=100,
+    WIDTH=800,
+    HEIGHT=800,
+    palette="hsv",
+    workers=1,
+    state=None,
+    sink=None,
+    cache=None,
+    subdivide=False,
+):
+    print(f"Generating Julia Set... ({MAX_ITER})")
+    repeat = frame_repeat(MAX_ITER)
+    # The cache is keyed by what is rendered, so a frame is only reused when
+    # c, the viewport, the size and MAX_ITER all match
+    with span("frame", MAX_ITER=MAX_ITER, first=cnt):
+        img = render_julia_frame(
+            MAX_ITER, WIDTH, HEIGHT, palette, workers, state, cache, subdivide
         )
-        img = cv2.imread(f"{logo_path}")
-        img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_CUBIC)
-
-        for x in range(WIDTH):
-            for y in range(HEIGHT):
-                zx = xmin + (xmax - xmin) * x / WIDTH
-                zy = ymin + (ymax - ymin) * y / HEIGHT
-                z = complex(zx, zy)
-                m = julia(c, z, MAX_ITER)
-
-                # Color mapping
-                hue = int(255 * m / MAX_ITER)
-                saturation = 255
-                value = 255 if m < MAX_ITER else 0
-
-                color = cv2.cvtColor(
-                    np.uint8([[[hue, saturation, value]]]), cv2.COLOR_HSV2BGR
-                )[0][0]
-                if np.all(color == [0, 0, 0]):
-                    continue
-                img[y, x] = color
-
-        img = cv2.resize(img, (WIDTH, HEIGHT), interpolation=cv2.INTER_CUBIC)
 
-    repeat = max(1, 5 - MAX_ITER)  # 0,0,0,0,1,1,1,2,2,3,4,5,...
-    for _ in range(repeat):
-        if not let_continue:
-            img_name = f"{p}/{cnt:04d}.png"
-            b = cv2.imwrite(img_name, img)
-            if not b:
-                a = 0
-        cnt += 1
+        if sink is not None:
+            sink.write(img, repeat)
+            return cnt + repeat
+
+        import cv2
+
+        p = os.path.abspath(OUT_DIR)
+        os.makedirs(p, exist_ok=True)
+        with span("png_write", frames=repeat):
+            for _ in range(repeat):
+                img_name = f"{p}/{cnt:04d}.png"
+                b = cv2.imwrite(img_name, img)
+                if not b:
+                    a = 0
+                cnt += 1
     return cnt
 
     # cv2.imshow("Julia Set", img)
@@ -72,12 +136,38 @@ def generate_julia(cnt=0, MAX_ITER=100, WIDTH=800, HEIGHT=800):
     # cv2.destroyAllWindows()
 
 
+def load_julia_state(WIDTH, HEIGHT):
+    # Resume from the checkpoint of an interrupted sweep if it was rendering
+    # the same set at the same size
+    key = f"julia {C} [{XMIN}, {XMAX}]x[{YMIN}, {YMAX}] {WIDTH}x{HEIGHT}"
+    path = os.path.join(os.path.abspath(OUT_DIR), "_state.npz")
+    if os.path.exists(path):
+        state = EscapeState.load(path)
+        if state.key == key:
+            return state, path
+    xs = linear_axis(XMIN, XMAX, WIDTH)
+    ys = linear_axis(YMIN, YMAX, HEIGHT)
+    return EscapeState.for_julia(C, xs, ys, key), path
+
+
 def main_3_julia():
     cnt = 0
     repeat_cnt = 0
     MAX_ITER = 1
+    state, state_path = load_julia_state(1080, 1080)
+    cache = RenderCache(os.path.abspath(CACHE_DIR))
+    saved = time.perf_counter()
     while MAX_ITER < 1500:
-        cnt = generate_julia(cnt, MAX_ITER, WIDTH=1080, HEIGHT=1080)
+        cnt = generate_julia(
+            cnt, MAX_ITER, WIDTH=1080, HEIGHT=1080, workers=os.cpu_count(),
+            state=state, cache=cache,
+        )
+        # The checkpoint is the whole state (~29 MB at 1080x1080), so it is
+        # written every CHECKPOINT_SECONDS rather than after every frame
+        if time.perf_counter() - saved >= CHECKPOINT_SECONDS:
+            with span("checkpoint"):
+                state.save(state_path)
+            saved = time.perf_counter()
         # if MAX_ITER < 4:
         #     repeat_cnt += 1
         #     if repeat_cnt >= 2:
@@ -88,9 +178,61 @@ def main_3_julia():
 
         # MAX_ITER += 1
         MAX_ITER = MAX_ITER + max(0, MAX_ITER // 10) + 1
+    with span("checkpoint"):
+        state.save(state_path)
+    print(f"Render cache: {cache.stats}, hit rate {cache.hit_rate:.0%}")
+
+
+def iter_schedule(stop=1500):
+    MAX_ITER = 1
+    while MAX_ITER < stop:
+        yield MAX_ITER
+        MAX_ITER = MAX_ITER + max(0, MAX_ITER // 10) + 1
+
+
+def main_4_julia_video(fps=15, save_png=False):
+    # Render straight into the video: no PNG round-trip through c05.
+    # c05 plays the frames from the highest MAX_ITER down, so the state is
+    # advanced once to the last MAX_ITER and every lower frame is read back
+    # from its escape counts.
+    p = os.path.abspath(OUT_DIR)
+    os.makedirs(p, exist_ok=True)
+    schedule = list(iter_schedule())
+    xs = linear_axis(XMIN, XMAX, 1080)
+    ys = linear_axis(YMIN, YMAX, 1080)
+    state = EscapeState.for_julia(C, xs, ys)
+    state.advance(schedule[-1])
+
+    sink = VideoSink(f"{p}/_out_video.mp4", fps=fps)
+    if save_png:
+        # Same file names as main_3_julia, counted down from the last frame
+        total = sum(frame_repeat(MAX_ITER) for MAX_ITER in schedule)
+        sink = TeeSink(sink, PngSink(p, start=total - 1, step=-1))
+    with sink:
+        cnt = 0
+        for MAX_ITER in reversed(schedule):
+            cnt = generate_julia(
+                cnt, MAX_ITER, WIDTH=1080, HEIGHT=1080, state=state, sink=sink
+            )
+
+
+def main_5_julia_path(frames=300, WIDTH=1280, HEIGHT=720, fps=30, workers=None):
+    # c walks once around the circle |c| = 0.7885 instead of staying at C;
+    # frames are rendered in parallel and written to the video in order
+    p = os.path.abspath(OUT_DIR)
+    os.makedirs(p, exist_ok=True)
+    half_width = 1.2 * WIDTH / HEIGHT  # same scale on both axes
+    viewport = (-half_width, half_width, -1.2, 1.2)
+    with VideoSink(f"{p}/_out_path.mp4", fps=fps) as sink:
+        render_path(
+            circle_path(), frames, WIDTH, HEIGHT, 100, sink, viewport,
+            workers=workers,
+        )
 
 
 if __name__ == "__main__":
     # main_1()
     # main_2()
     main_3_julia()
+    # main_4_julia_video()
+    # main_5_julia_path()
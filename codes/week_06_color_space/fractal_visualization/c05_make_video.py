@@ -1,8 +1,12 @@
 # Specify the folder containing images and the output video file name
 import os
+import sys
 import cv2
+from fractals import VideoSink
 
 p = r"codes\week_06_color_space\fractal_visualization\out_frac_julia"
+if len(sys.argv) > 1:
+    p = sys.argv[1]  # e.g. the out_frac_zoom folder of c07_deep_zoom_animation.py
 p = os.path.abspath(p)
 assert os.path.exists(p)
 image_folder = p
@@ -28,8 +32,8 @@ height, width, layers = first_image.shape
 # Define the codec and create VideoWriter object
 
 fps = 15  # frame rate
-fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # You can use 'MJPG' or 'XVID'
-video = cv2.VideoWriter(video_name, fourcc, fps, (width, height))
+# Encoding runs on its own thread while the next image is being read
+video = VideoSink(video_name, fps=fps, fourcc="mp4v")  # or 'MJPG' / 'XVID'
 
 # Loop through the images and write them to the video
 for image in images:
@@ -40,10 +44,11 @@ for image in images:
         print(f"Warning: {image} could not be read.")
         continue  # Skip this image if it cannot be read
 
-    frame = cv2.resize(frame, (width, height))
+    if frame.shape[:2] != (height, width):
+        frame = cv2.resize(frame, (width, height))
     video.write(frame)  # Write the frame to the video
     print(f"Added {image} to video.")  # Debugging output
 
-# Release the video writer object
-video.release()
+# Flush the encoder thread and release the video writer
+video.close()
 cv2.destroyAllWindows()
@@ -0,0 +1,27 @@
+import time
+import numpy as np
+from fractals import linear_axis, mandelbrot_grid
+
+# Plain iteration vs. cardioid/bulb test + periodicity checking
+WIDTH, HEIGHT = 800, 800
+
+
+def benchmark_interior(max_iters=(100, 250, 500, 1000, 1500)):
+    xs = linear_axis(-2.0, 1.0, WIDTH)
+    ys = linear_axis(-1.5, 1.5, HEIGHT)
+    print(f"{'MAX_ITER':>8} {'plain (s)':>10} {'shortcuts (s)':>14} {'speedup':>8}")
+    for max_iter in max_iters:
+        t = time.perf_counter()
+        plain = mandelbrot_grid(xs, ys, max_iter)
+        t_plain = time.perf_counter() - t
+
+        t = time.perf_counter()
+        fast = mandelbrot_grid(xs, ys, max_iter, shortcuts=True)
+        t_fast = time.perf_counter() - t
+
+        assert np.array_equal(plain, fast), "shortcuts changed the image"
+        print(f"{max_iter:>8} {t_plain:>10.3f} {t_fast:>14.3f} {t_plain / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_interior()
@@ -0,0 +1,57 @@
+import os
+from fractals import PngSink, VideoSink, colorize, deep_zoom
+
+OUT_DIR = r"codes\week_06_color_space\fractal_visualization\out_frac_zoom"
+# Center of the zoom, as strings so no digits are lost to float64: the
+# Misiurewicz point M(4,1), where three arms of the set meet, to 125 digits.
+# The picture repeats itself there every factor 1.33 (its repelling
+# multiplier), so the escape counts only grow by ~8 per decade.
+CX = (
+    "-0.1010963638456221610257854457386225654638054428262534838769311"
+    "7766078084074047058427482121981051677903340453190855674119397155"
+)
+CY = (
+    "0.95628651080914150077109605772997743580983333651052917003431432"
+    "150052465906571673252697841078733980720434447249264692843667524"
+)
+BASE_ITER = 300
+ITER_PER_DECADE = 10
+
+
+def generate_zoom(
+    frames=120,
+    start_scale=3.0,
+    end_scale=1e-13,
+    WIDTH=800,
+    HEIGHT=800,
+    palette="hsv",
+    video=False,
+):
+    p = os.path.abspath(OUT_DIR)
+    if video:
+        os.makedirs(p, exist_ok=True)
+        sink = VideoSink(f"{p}/_out_video.mp4", fps=15)
+    else:
+        # Same layout as out_frac_julia: c05_make_video.py plays the files in
+        # reverse name order, so the first (widest) frame gets the highest number
+        sink = PngSink(p, start=frames - 1, step=-1)
+
+    with sink:
+        zoom = deep_zoom(
+            CX, CY, start_scale, end_scale, frames, WIDTH, HEIGHT,
+            BASE_ITER, ITER_PER_DECADE,
+        )
+        for scale, MAX_ITER, counts in zoom:
+            print(f"Generated zoom frame... (scale {scale:.3g}, {MAX_ITER})")
+            sink.write(colorize(counts, MAX_ITER, palette))
+
+
+def main_deep_zoom():
+    # Past ~1e-13 plain float64 pixelates; the perturbation renderer keeps
+    # going (down to ~1e-300) at about the cost of a shallow frame. CX/CY
+    # carry 125 digits, enough for views down to ~1e-120.
+    generate_zoom(frames=120, end_scale=1e-100)
+
+
+if __name__ == "__main__":
+    main_deep_zoom()
@@ -0,0 +1,629 @@
+import argparse
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from fractals import FrameSink
+
+# Runs every generator of c01-c04 headless over a grid of sizes and MAX_ITER
+# values, one process per case so the peak RSS belongs to that case alone.
+# Results are saved as JSON and compared against a stored baseline.
+BENCH_DIR = r"codes\week_06_color_space\fractal_visualization\benchmarks"
+SIZES = (256, 512, 1024, 2048, 4096)
+MAX_ITERS = (10, 100, 500, 2000)
+THRESHOLD = 0.10  # a case more than 10% slower than the baseline regressed
+
+# Cold start of a compute-only import, as a pool worker or short job pays it.
+# NumPy is most of it; display and encoding backends must not load at all.
+IMPORT_STATEMENT = (
+    "from fractals import EscapeState, colorize, julia_grid, mandelbrot_grid"
+)
+IMPORT_BUDGET_MS = 150
+FORBIDDEN_MODULES = ("cv2", "matplotlib")
+
+N_POINTS = 1_000_000  # chaos game points (Sierpinski in c02/c03)
+FERN_POINTS = 10_000_000
+BUDDHA_SAMPLES = 1_000_000  # c samples per Buddhabrot case
+KOCH_DEPTH = 4
+SIERPINSKI_DEGREE = 6
+
+
+def peak_rss():
+    # Peak resident set size of this process in bytes
+    try:
+        import resource
+    except ImportError:  # Windows
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            process, ctypes.byref(counters), counters.cb
+        )
+        return counters.PeakWorkingSetSize
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # Linux: KiB
+
+
+def headless():
+    # Windows become no-ops and plt.show() just closes the figure
+    import cv2
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    cv2.imshow = lambda *args: None
+    cv2.namedWindow = lambda *args: None
+    cv2.waitKey = lambda *args: -1
+    cv2.destroyAllWindows = lambda: None
+    plt.show = lambda *args, **kwargs: plt.close("all")
+
+
+def record(module, name, result=False):
+    # Wraps module.name to keep the last counts it saw (its first argument,
+    # or its result), so iterations can be totalled without a second render
+    func = getattr(module, name)
+    seen = {}
+
+    def wrapper(*args, **kwargs):
+        out = func(*args, **kwargs)
+        seen["counts"] = out if result else args[0]
+        return out
+
+    setattr(module, name, wrapper)
+    return seen
+
+
+def escape_case(script, func, grid, animate=None):
+    # Mandelbrot/Julia: one image; iterations = sum of the escape counts
+    def run(size, max_iter):
+        module = importlib.import_module(script)
+        module.WIDTH = module.HEIGHT = size
+        module.MAX_ITER = max_iter
+        if script.startswith("c01"):
+            seen = record(module, grid, result=True)
+        else:
+            seen = record(module, "colorize")
+        kwargs = {} if animate is None else {"animate": animate}
+        t = time.perf_counter()
+        getattr(module, func)(**kwargs)
+        wall = time.perf_counter() - t
+        return wall, int(seen["counts"].sum(dtype=np.int64)), 1
+
+    return run, True, True
+
+
+def points_case(script, func, iterations, animate=None, **kwargs):
+    # Point/geometry generators: iterations = points or vertices produced
+    def run(size, max_iter):
+        module = importlib.import_module(script)
+        if size is not None:
+            module.WIDTH = module.HEIGHT = size
+        if animate is not None:
+            kwargs["animate"] = animate
+        t = time.perf_counter()
+        getattr(module, func)(**kwargs)
+        return time.perf_counter() - t, iterations, 1
+
+    return run, script != "c01_fractal_visualization", False
+
+
+class NullSink(FrameSink):
+    # Frames are rendered and discarded
+    def write(self, frame, repeat=1):
+        pass
+
+
+def julia_sweep(size, max_iter):
+    # The c04 MAX_ITER sweep up to max_iter: counts and colors of every
+    # frame. The logo background is left out, its file is only found from
+    # the directory c04 is meant to be run from.
+    from fractals import colorize
+
+    module = importlib.import_module("c04_fractal_visualization_animated_julia")
+
+    xs = module.linear_axis(module.XMIN, module.XMAX, size)
+    ys = module.linear_axis(module.YMIN, module.YMAX, size)
+    t = time.perf_counter()
+    state = module.EscapeState.for_julia(module.C, xs, ys)
+    frames = 0
+    for MAX_ITER in module.iter_schedule(max_iter + 1):
+        counts = module.julia_counts(MAX_ITER, size, size, state=state)
+        colorize(counts, MAX_ITER)
+        frames += 1
+    wall = time.perf_counter() - t
+    return wall, int(state.counts.sum(dtype=np.int64)), frames
+
+
+def engine_case(kind, precision):
+    # The escape-time engine alone at a fixed precision, to compare float32
+    # with float64 coordinates (throughput and peak memory)
+    def run(size, max_iter):
+        from fractals import julia_grid, linear_axis, mandelbrot_grid
+
+        xmin, xmax, ymin, ymax = (-2.0, 1.0, -1.5, 1.5)
+        if kind == "julia":
+            xmin = -1.5
+        xs = linear_axis(xmin, xmax, size)
+        ys = linear_axis(ymin, ymax, size)
+        t = time.perf_counter()
+        if kind == "mandelbrot":
+            counts = mandelbrot_grid(
+                xs, ys, max_iter, shortcuts=True, precision=precision
+            )
+        else:
+            c = complex(-0.7, 0.27)
+            counts = julia_grid(c, xs, ys, max_iter, precision=precision)
+        wall = time.perf_counter() - t
+        return wall, int(counts.sum(dtype=np.int64)), 1
+
+    return run, True, True
+
+
+def julia_path(size, max_iter, frames=24):
+    # c04 main_5: frames along a path of c, rendered in parallel
+    from fractals import circle_path, render_path
+
+    wall = render_path(circle_path(), frames, size, size, max_iter, NullSink())
+    return wall, 0, frames
+
+
+def aa_case(kind, mode):
+    # Anti-aliasing of the c02 views: "plain" (one sample per pixel),
+    # "adaptive" (edge pixels only), "budget" (edge pixels, sharpest first,
+    # within the time of the plain render) or "ssaa16" (4 x 4 samples
+    # everywhere). aa_cost is the wall time over that of the plain render it
+    # started from, both in the same process. aa_error is the mean color
+    # difference to a separately seeded 16x render, computed after the
+    # timing; for ssaa16 it is the noise floor. aa_share is the part of the
+    # edge pixels that was re-sampled.
+    def run(size, max_iter):
+        from fractals import (
+            antialias,
+            colorize,
+            julia_grid,
+            linear_axis,
+            mandelbrot_grid,
+        )
+
+        c = complex(-0.7, 0.27) if kind == "julia" else None
+        xmin = -2.0 if kind == "mandelbrot" else -1.5
+        xs = linear_axis(xmin, xmin + 3.0, size)
+        ys = linear_axis(-1.5, 1.5, size)
+        everywhere = {"mask": np.ones((size, size), dtype=bool), "adaptive": False}
+        t = time.perf_counter()
+        if kind == "mandelbrot":
+            counts = mandelbrot_grid(xs, ys, max_iter, shortcuts=True, symmetry=True)
+        else:
+            counts = julia_grid(c, xs, ys, max_iter, symmetry=True)
+        img = colorize(counts, max_iter)
+        plain = time.perf_counter() - t
+        done, edges = 0, 0
+        if mode == "adaptive":
+            done, edges = antialias(img, kind, c, xs, ys, max_iter, symmetry=True)
+        elif mode == "budget":
+            done, edges = antialias(
+                img, kind, c, xs, ys, max_iter, symmetry=True, budget=plain
+            )
+        elif mode == "ssaa16":
+            antialias(img, kind, c, xs, ys, max_iter, symmetry=True, **everywhere)
+        wall = time.perf_counter() - t
+
+        reference = colorize(counts, max_iter)
+        antialias(
+            reference, kind, c, xs, ys, max_iter, seed=1, symmetry=True,
+            **everywhere,
+        )
+        error = np.abs(img.astype(np.float32) - reference).mean()
+        extra = {"aa_cost": wall / plain, "aa_error": float(error)}
+        if edges:
+            extra["aa_share"] = done / edges
+        return wall, int(counts.sum(dtype=np.int64)), 1, extra
+
+    return run, True, True
+
+
+def buddhabrot_case(sampler, samples=BUDDHA_SAMPLES):
+    # c12: orbit-density sampling with one band up to max_iter; iterations
+    # holds the number of c samples, like the point generators
+    def run(size, max_iter):
+        from fractals import render_buddhabrot
+
+        t = time.perf_counter()
+        render_buddhabrot(
+            size, size, samples, bands=((0, max_iter),), sampler=sampler, seed=0
+        )
+        return time.perf_counter() - t, samples, 1
+
+    return run, True, True
+
+
+def explorer_case(size, max_iter, events=30):
+    # c11 interaction latency: each pan or zoom plus the redraw after it,
+    # while the background refinement competes for the CPU. wall / frames
+    # is the mean latency per event.
+    from fractals import Explorer
+
+    view = Explorer("mandelbrot", size, size, -0.5, 3.0 / size, max_iter)
+    view.wait()
+    wall = 0.0
+    for i in range(events):
+        t = time.perf_counter()
+        if i % 3:
+            view.pan(9, -4)
+        else:
+            view.zoom(0.9, at=(size // 3, size // 3))
+        view.image()
+        wall += time.perf_counter() - t
+        time.sleep(0.016)  # one display frame between events
+    view.close()
+    return wall, 0, events
+
+
+C01 = "c01_fractal_visualization"
+C02 = "c02_fractal_visualization"
+C03 = "c03_fractal_visualization_animated"
+KOCH_VERTICES = 3 * 4**KOCH_DEPTH
+
+# name -> (run(size, max_iter) -> (wall, iterations, frames),
+#          varies with size, varies with MAX_ITER)
+CASES = {
+    "c01.mandelbrot": escape_case(C01, "plot_mandelbrot", "mandelbrot_grid"),
+    "c01.julia": escape_case(C01, "plot_julia", "julia_grid"),
+    "c01.sierpinski": points_case(
+        C01, "plot_sierpinski", (3**SIERPINSKI_DEGREE - 1) // 2,
+        degree=SIERPINSKI_DEGREE,
+    ),
+    "c01.koch": points_case(C01, "plot_koch_snowflake", KOCH_VERTICES),
+    "c01.barnsley": points_case(
+        C01, "plot_barnsley_fern", FERN_POINTS, n_points=FERN_POINTS
+    ),
+    "c02.mandelbrot": escape_case(C02, "generate_mandelbrot", None),
+    "c02.julia": escape_case(C02, "generate_julia", None),
+    "c02.sierpinski": points_case(
+        C02, "generate_sierpinski", N_POINTS, n_points=N_POINTS
+    ),
+    "c02.koch": points_case(
+        C02, "generate_koch_snowflake", KOCH_VERTICES, depth=KOCH_DEPTH
+    ),
+    "c02.barnsley": points_case(
+        C02, "generate_barnsley_fern", FERN_POINTS, n_points=FERN_POINTS
+    ),
+    "c03.mandelbrot": escape_case(C03, "generate_mandelbrot", None, animate=True),
+    "c03.julia": escape_case(C03, "generate_julia", None, animate=True),
+    "c03.sierpinski": points_case(
+        C03, "generate_sierpinski", N_POINTS, animate=True, n_points=N_POINTS
+    ),
+    "c03.koch": points_case(
+        C03, "generate_koch_snowflake", KOCH_VERTICES, animate=True,
+        depth=KOCH_DEPTH,
+    ),
+    "c03.barnsley": points_case(
+        C03, "generate_barnsley_fern", FERN_POINTS, animate=True,
+        n_points=FERN_POINTS,
+    ),
+    "c04.sweep": (julia_sweep, True, True),
+    "c04.path": (julia_path, True, True),
+    "c11.interact": (explorer_case, True, True),
+    "aa.mandelbrot.plain": aa_case("mandelbrot", "plain"),
+    "aa.mandelbrot.adaptive": aa_case("mandelbrot", "adaptive"),
+    "aa.mandelbrot.budget": aa_case("mandelbrot", "budget"),
+    "aa.mandelbrot.ssaa16": aa_case("mandelbrot", "ssaa16"),
+    "aa.julia.plain": aa_case("julia", "plain"),
+    "aa.julia.adaptive": aa_case("julia", "adaptive"),
+    "aa.julia.budget": aa_case("julia", "budget"),
+    "aa.julia.ssaa16": aa_case("julia", "ssaa16"),
+    "c12.buddhabrot.uniform": buddhabrot_case("uniform"),
+    "c12.buddhabrot.mh": buddhabrot_case("mh"),
+    "engine.mandelbrot.float64": engine_case("mandelbrot", "float64"),
+    "engine.mandelbrot.float32": engine_case("mandelbrot", "float32"),
+    "engine.julia.float64": engine_case("julia", "float64"),
+    "engine.julia.float32": engine_case("julia", "float32"),
+}
+
+
+def _importtime(code):
+    # Top-level modules and their cumulative import time in microseconds,
+    # from `python -X importtime` in a fresh interpreter
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=here, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.rstrip()] = int(cumulative)
+    return modules
+
+
+def import_time(statement=IMPORT_STATEMENT, repeat=5):
+    # Best of `repeat` cold starts, not counting interpreter startup itself
+    startup = {name.strip() for name in _importtime("pass")}
+    best = None
+    for _ in range(repeat):
+        modules = _importtime(statement)
+        total = sum(
+            us for name, us in modules.items()
+            if not name.startswith("  ") and name.strip() not in startup
+        )
+        best = total if best is None else min(best, total)
+    loaded = {name.strip().split(".")[0] for name in modules}
+    return {
+        "statement": statement,
+        "ms": best / 1e3,
+        "forbidden": sorted(loaded & set(FORBIDDEN_MODULES)),
+    }
+
+
+def run_case(name, size, max_iter):
+    # Child process side: prints one JSON line with the measurements
+    headless()
+    run = CASES[name][0]
+    # A case may return a fourth item: extra measurements for the report
+    wall, iterations, frames, *extra = run(size, max_iter)
+    print(json.dumps({
+        "wall_s": wall,
+        "iterations": iterations,
+        "frames": frames,
+        "peak_rss_bytes": peak_rss(),
+        **(extra[0] if extra else {}),
+    }))
+
+
+RUN_FIELDS = ("wall_s", "iterations", "frames", "peak_rss_bytes")
+
+
+def measure(name, size, max_iter, repeat=1):
+    # Best wall time of `repeat` fresh processes
+    cmd = [sys.executable, os.path.abspath(__file__), "--case", name]
+    if size is not None:
+        cmd += ["--size", str(size)]
+    if max_iter is not None:
+        cmd += ["--max-iter", str(max_iter)]
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["wall_s"])
+    pixels = (size or 0) ** 2 * best["frames"]
+    return {
+        "wall_s": best["wall_s"],
+        "pixels_per_s": pixels / best["wall_s"] if pixels else None,
+        "iterations_per_s": best["iterations"] / best["wall_s"],
+        "iterations": best["iterations"],
+        "frames": best["frames"],
+        "peak_rss_mb": max(r["peak_rss_bytes"] for r in runs) / 2**20,
+        **{k: v for k, v in best.items() if k not in RUN_FIELDS},
+    }
+
+
+def plan(patterns, sizes, max_iters):
+    for name, (_, by_size, by_iter) in CASES.items():
+        if not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        for size in sizes if by_size else [None]:
+            for max_iter in max_iters if by_iter else [None]:
+                yield name, size, max_iter
+
+
+def case_id(result):
+    return f"{result['case']} size={result['size']} max_iter={result['max_iter']}"
+
+
+def precision_gain(results):
+    # float64 -> float32 speedup and memory saved, per engine case
+    by_id = {case_id(r): r for r in results if "wall_s" in r}
+    gains = []
+    for r in results:
+        if not r["case"].endswith(".float64") or "wall_s" not in r:
+            continue
+        other = dict(r, case=r["case"][: -len("float64")] + "float32")
+        fast = by_id.get(case_id(other))
+        if fast is None:
+            continue
+        gains.append({
+            "case": r["case"][: -len(".float64")],
+            "size": r["size"],
+            "max_iter": r["max_iter"],
+            "speedup": r["wall_s"] / fast["wall_s"],
+            "rss_saved_mb": r["peak_rss_mb"] - fast["peak_rss_mb"],
+        })
+    if gains:
+        print(f"\n{'float32 vs float64':<44} {'speedup':>8} {'RSS saved (MB)':>15}")
+    for g in gains:
+        print(
+            f"{case_id(g):<44} {g['speedup']:>7.2f}x {g['rss_saved_mb']:>15.1f}"
+        )
+    return gains
+
+
+def aa_gain(results):
+    # Cost (relative to the plain render, measured in the same process, so
+    # process to process noise does not count) and error of each kind of
+    # anti-aliasing, per view, plus the share of the edges the budget covered
+    modes = ("plain", "adaptive", "budget", "ssaa16")
+    by_id = {case_id(r): r for r in results if "wall_s" in r}
+    gains = []
+    for r in results:
+        if not r["case"].endswith(".plain") or "wall_s" not in r:
+            continue
+        view = r["case"][: -len(".plain")]
+        gain = {"case": view, "size": r["size"], "max_iter": r["max_iter"]}
+        for mode in modes:
+            other = by_id.get(case_id(dict(r, case=f"{view}.{mode}")))
+            if other is None:
+                break
+            gain[f"{mode}_cost"] = other["aa_cost"]
+            gain[f"{mode}_error"] = other["aa_error"]
+        else:
+            gain["budget_share"] = by_id[
+                case_id(dict(r, case=f"{view}.budget"))
+            ].get("aa_share", 1.0)
+            gains.append(gain)
+    if gains:
+        header = " ".join(f"{m:>12}" for m in modes)
+        print(f"\n{'anti-aliasing: cost / error':<44} {header} {'edges':>6}")
+    for g in gains:
+        cells = " ".join(
+            f"{g[f'{m}_cost']:>5.2f}x/{g[f'{m}_error']:<5.2f}" for m in modes
+        )
+        print(f"{case_id(g):<44} {cells} {g['budget_share']:>6.0%}")
+    return gains
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # Prints the ratio to the baseline for every case both runs have;
+    # returns the cases slower than (1 + threshold) times the baseline
+    before = {case_id(r): r for r in baseline["results"] if "wall_s" in r}
+    regressions = []
+    print(f"\n{'case':<44} {'baseline':>9} {'now':>9} {'ratio':>6}")
+    for r in results:
+        old = before.get(case_id(r))
+        if old is None or "wall_s" not in r:
+            continue
+        ratio = r["wall_s"] / old["wall_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(case_id(r))
+            flag = "  REGRESSION"
+        print(
+            f"{case_id(r):<44} {old['wall_s']:>9.3f} {r['wall_s']:>9.3f}"
+            f" {ratio:>5.2f}x{flag}"
+        )
+    return regressions
+
+
+def benchmark(patterns, sizes, max_iters, repeat=1):
+    results = []
+    print(
+        f"{'case':<44} {'wall (s)':>9} {'Mpixel/s':>9} {'Miter/s':>9}"
+        f" {'RSS (MB)':>9}"
+    )
+    for name, size, max_iter in plan(patterns, sizes, max_iters):
+        r = {"case": name, "size": size, "max_iter": max_iter}
+        r.update(measure(name, size, max_iter, repeat))
+        results.append(r)
+        if "error" in r:
+            print(f"{case_id(r):<44} failed: {r['error']}")
+            continue
+        mpix = r["pixels_per_s"] / 1e6 if r["pixels_per_s"] else float("nan")
+        print(
+            f"{case_id(r):<44} {r['wall_s']:>9.3f} {mpix:>9.2f}"
+            f" {r['iterations_per_s'] / 1e6:>9.2f} {r['peak_rss_mb']:>9.1f}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fractal generators")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="glob patterns")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--max-iters", nargs="+", type=int, default=list(MAX_ITERS))
+    parser.add_argument("--repeat", type=int, default=1, help="best of N runs")
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="store this run as baseline"
+    )
+    # Internal: run a single case in this process
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--max-iter", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case, args.size, args.max_iter)
+        return 0
+
+    imports = import_time()
+    print(
+        f"import: {imports['ms']:.1f} ms (budget {args.import_budget_ms:g} ms)"
+        f" for {imports['statement']!r}"
+    )
+    import_ok = imports["ms"] <= args.import_budget_ms and not imports["forbidden"]
+    if imports["forbidden"]:
+        print(f"import: loads {', '.join(imports['forbidden'])}")
+    print()
+
+    results = benchmark(args.cases, args.sizes, args.max_iters, args.repeat)
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "import": imports,
+        "results": results,
+        "precision_gain": precision_gain(results),
+        "aa_gain": aa_gain(results),
+    }
+    out = os.path.abspath(args.out)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {out}")
+
+    status = 0
+    if not import_ok:
+        print("\nImport budget exceeded")
+        status = 1
+    failed = [case_id(r) for r in results if "error" in r]
+    if failed:
+        print(f"\n{len(failed)} case(s) failed: {', '.join(failed)}")
+        status = 1
+
+    baseline_path = os.path.abspath(args.baseline)
+    if args.update_baseline:
+        if failed:
+            # A baseline without these cases would hide their later failures
+            print("Baseline not updated")
+            return status
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
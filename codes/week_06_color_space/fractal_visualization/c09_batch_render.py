@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+from fractals import BatchRunner
+
+# Unattended rendering: no input() menu and no windows. Jobs come from a JSON
+# file (a list of job dicts, see fractals/batch.py) and share one worker pool.
+OUT_DIR = r"codes\week_06_color_space\fractal_visualization\out_batch"
+
+# The five fractals of the menus in c01-c03, plus the c04 MAX_ITER sweep
+EXAMPLE_JOBS = [
+    {"name": "mandelbrot", "fractal": "mandelbrot", "width": 800, "height": 800,
+     "max_iter": 100, "priority": 1},
+    {"name": "julia", "fractal": "julia", "c": [-0.7, 0.27], "width": 800,
+     "height": 800, "max_iter": 100, "priority": 1},
+    {"name": "sierpinski", "fractal": "sierpinski", "width": 800, "height": 800},
+    {"name": "koch", "fractal": "koch", "width": 800, "height": 800, "depth": 4},
+    {"name": "barnsley", "fractal": "barnsley", "width": 800, "height": 800},
+    {"name": "julia_sweep", "fractal": "julia", "c": [-0.7, 0.27], "width": 1080,
+     "height": 1080, "max_iters": list(range(1, 200, 4)),
+     "sink": {"type": "video", "path": "julia_sweep.mp4", "fps": 15}},
+]
+
+
+def with_output_dir(jobs, out_dir):
+    # Relative sink paths (and jobs without a sink) land in out_dir
+    for job in jobs:
+        sink = dict(job.get("sink", {"type": "png", "path": job["name"]}))
+        if not os.path.isabs(sink["path"]):
+            sink["path"] = os.path.join(out_dir, sink["path"])
+        job["sink"] = sink
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render fractal jobs headless")
+    parser.add_argument("jobs", nargs="?", help="JSON job list (default: examples)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=OUT_DIR)
+    args = parser.parse_args()
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobs = json.load(f)
+    else:
+        jobs = [dict(job) for job in EXAMPLE_JOBS]
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = with_output_dir(jobs, out_dir)
+
+    # Rerunning after an interruption picks up from this file
+    runner = BatchRunner(jobs, args.workers, os.path.join(out_dir, "_progress.json"))
+    reports = runner.run()
+    with open(os.path.join(out_dir, "_report.json"), "w") as f:
+        json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+from fractals import PYRAMID_TILE, render_pyramid
+
+# Posters larger than RAM: iteration counts live in a memory-mapped file and
+# the image is written as a Deep Zoom pyramid (fractal.dzi + fractal_files/),
+# e.g. for OpenSeadragon. Run the same command again to resume after a crash.
+OUT_DIR = r"codes\week_06_color_space\fractal_visualization\out_gigapixel"
+
+VIEWPORTS = {
+    "mandelbrot": (-2.0, 1.0, -1.5, 1.5),
+    "julia": (-1.5, 1.5, -1.5, 1.5),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a gigapixel fractal")
+    parser.add_argument("fractal", nargs="?", default="mandelbrot",
+                        choices=sorted(VIEWPORTS))
+    parser.add_argument("--width", type=int, default=16384)
+    parser.add_argument("--height", type=int, default=16384)
+    parser.add_argument("--max-iter", type=int, default=500)
+    parser.add_argument("--c", type=complex, default=complex(-0.7, 0.27))
+    parser.add_argument("--palette", default="hsv")
+    parser.add_argument("--format", default="png", choices=("png", "jpg"))
+    parser.add_argument("--tile-size", type=int, default=PYRAMID_TILE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=OUT_DIR)
+    args = parser.parse_args()
+
+    c = args.c if args.fractal == "julia" else None
+    render_pyramid(
+        args.fractal,
+        c,
+        VIEWPORTS[args.fractal],
+        args.width,
+        args.height,
+        args.max_iter,
+        os.path.abspath(args.out),
+        tile_size=args.tile_size,
+        palette=args.palette,
+        fmt=args.format,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import cv2
+from fractals import Explorer
+
+# Interactive explorer: drag to pan, mouse wheel to zoom (i / o zoom at the
+# center where the wheel is not delivered), + / - to double or halve
+# MAX_ITER, r to reset, ESC or q to quit. Pans only compute the exposed
+# strips; zooms show a resampled preview at once and refine it in the
+# background.
+WIDTH, HEIGHT = 1920, 1080
+MAX_ITER = 200
+ZOOM_STEP = 0.8  # scale factor per wheel notch
+REDRAW_MS = 15
+
+C = complex(-0.7, 0.27)
+VIEWS = {
+    # center and units per pixel of the start view, as in c02/c03
+    "mandelbrot": (complex(-0.5, 0.0), 3.0 / HEIGHT),
+    "julia": (0j, 3.0 / HEIGHT),
+}
+
+
+def explore(kind="mandelbrot", palette="hsv"):
+    window = f"{kind.capitalize()} Explorer"
+    center, scale = VIEWS[kind]
+    view = Explorer(
+        kind, WIDTH, HEIGHT, center, scale, MAX_ITER, c=C if kind == "julia" else None
+    )
+    drag = {"last": None}
+
+    def on_mouse(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            drag["last"] = (x, y)
+        elif event == cv2.EVENT_LBUTTONUP:
+            drag["last"] = None
+        elif event == cv2.EVENT_MOUSEMOVE and drag["last"] is not None:
+            last_x, last_y = drag["last"]
+            view.pan(x - last_x, y - last_y)
+            drag["last"] = (x, y)
+        elif event == cv2.EVENT_MOUSEWHEEL:
+            up = cv2.getMouseWheelDelta(flags) > 0
+            view.zoom(ZOOM_STEP if up else 1 / ZOOM_STEP, at=(x, y))
+
+    cv2.namedWindow(window, cv2.WINDOW_AUTOSIZE)
+    cv2.setMouseCallback(window, on_mouse)
+    shown = None
+    try:
+        while True:
+            # Redraw while the view changes or refines, idle otherwise
+            state = (view.generation, view.done)
+            if state != shown or not view.done:
+                cv2.imshow(window, view.image(palette))
+                shown = state
+            key = cv2.waitKey(REDRAW_MS) & 0xFF
+            if key in (27, ord("q")):
+                break
+            elif key == ord("r"):
+                view.reset(*VIEWS[kind])
+            elif key in (ord("+"), ord("=")):
+                view.set_max_iter(view.max_iter * 2)
+            elif key == ord("-"):
+                view.set_max_iter(max(16, view.max_iter // 2))
+            elif key == ord("i"):
+                view.zoom(ZOOM_STEP)
+            elif key == ord("o"):
+                view.zoom(1 / ZOOM_STEP)
+    finally:
+        view.close()
+        cv2.destroyAllWindows()
+
+
+def main():
+    while True:
+        print("\nFractal Explorer Menu (using OpenCV):")
+        print("1. Mandelbrot Set")
+        print("2. Julia Set")
+        print("3. Exit")
+
+        choice = input("Enter your choice (1-3): ")
+
+        if choice == "1":
+            explore("mandelbrot")
+        elif choice == "2":
+            explore("julia")
+        elif choice == "3":
+            print("Exiting program...")
+            break
+        else:
+            print("Invalid choice. Please enter a number between 1 and 3.")
+
+
+if __name__ == "__main__":
+    main()
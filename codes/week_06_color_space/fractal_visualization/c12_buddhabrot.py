@@ -0,0 +1,64 @@
+import argparse
+import os
+from fractals import NEBULA_BANDS, nebula_image, render_buddhabrot
+
+# Buddhabrot / Nebulabrot: the density of the escaping orbits, one iteration
+# band per color channel. Good pictures take 10^8 - 10^9 samples; with a
+# checkpoint directory an interrupted run continues where it stopped.
+OUT_DIR = r"codes\week_06_color_space\fractal_visualization\out_buddhabrot"
+
+
+def parse_band(text):
+    lo, hi = text.split(":")
+    return int(lo), int(hi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a Buddhabrot")
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--bands", type=parse_band, nargs="+",
+                        default=list(NEBULA_BANDS),
+                        help="lo:hi escape iterations per channel, R G B")
+    parser.add_argument("--view", type=float, nargs=4, default=None,
+                        metavar=("XMIN", "XMAX", "YMIN", "YMAX"))
+    parser.add_argument("--anti", action="store_true",
+                        help="orbits that never escape (Anti-Buddhabrot)")
+    parser.add_argument("--sampler", default="mh", choices=("mh", "uniform"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--gamma", type=float, default=2.0)
+    parser.add_argument("--black", type=float, default=50.0,
+                        help="density percentile drawn black")
+    parser.add_argument("--no-rotate", action="store_true",
+                        help="keep the real axis horizontal")
+    parser.add_argument("--out", default=OUT_DIR)
+    args = parser.parse_args()
+
+    import cv2
+
+    out = os.path.abspath(args.out)
+    kwargs = {} if args.view is None else {"view": tuple(args.view)}
+    hist = render_buddhabrot(
+        args.width,
+        args.height,
+        args.samples,
+        bands=args.bands,
+        anti=args.anti,
+        sampler=args.sampler,
+        workers=args.workers,
+        seed=args.seed,
+        checkpoint_dir=os.path.join(out, "_checkpoints"),
+        **kwargs,
+    )
+    img = nebula_image(hist, gamma=args.gamma, black=args.black)
+    if not args.no_rotate:
+        img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)  # the "Buddha" pose, head up
+    name = "anti_buddhabrot.png" if args.anti else "buddhabrot.png"
+    cv2.imwrite(os.path.join(out, name), img)
+    print(f"Saved {os.path.join(out, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Submodules are imported on first use (PEP 562), so `from fractals import
+# mandelbrot_grid` loads NumPy and the escape-time engine only; process
+# pools, hashing, decimal, cv2 and matplotlib come in with the parts that
+# need them.
+import importlib
+
+_EXPORTS = {
+    "engine": [
+        "EscapeState",
+        "complex_grid",
+        "count_dtype",
+        "escape_time",
+        "in_main_bulbs",
+        "julia",
+        "julia_grid",
+        "linear_axis",
+        "mandelbrot",
+        "mandelbrot_grid",
+        "mandelbrot_points",
+        "pick_precision",
+    ],
+    "palettes": ["PALETTES", "colorize", "get_palette", "overlay", "register_palette"],
+    "tiled": ["iter_tiles", "render_tiled"],
+    "explorer": ["Explorer"],
+    "supersampling": ["AA_GRID", "antialias", "edge_contrast", "edge_mask", "supersample"],
+    "animation": ["cardioid_path", "circle_path", "render_path"],
+    "buddhabrot": ["NEBULA_BANDS", "nebula_image", "render_buddhabrot"],
+    "gigapixel": ["PYRAMID_TILE", "pyramid_levels", "render_pyramid"],
+    "batch": ["BatchRunner", "job_frames", "open_sink", "render_frame"],
+    "profiling": ["PROFILER", "Profiler", "count", "span"],
+    "sinks": ["FrameSink", "PngSink", "TeeSink", "VideoSink"],
+    "cache": ["RenderCache", "compact", "render_key"],
+    "subdivide": ["mariani_silver", "subdivide_julia", "subdivide_mandelbrot"],
+    "perturbation": [
+        "MIN_ESCAPED",
+        "deep_mandelbrot",
+        "deep_zoom",
+        "perturbation_grid",
+        "reference_orbit",
+        "zoom_schedule",
+    ],
+    "previews": [
+        "Pacer",
+        "progressive",
+        "progressive_julia",
+        "progressive_mandelbrot",
+    ],
+    "symmetry": [
+        "fill_symmetric",
+        "plan_symmetry",
+        "symmetric_progressive",
+        "symmetric_render",
+    ],
+    "density": ["log_density", "rasterize", "walk_density"],
+    "chaos": ["chaos_game", "chaos_game_batches", "regular_polygon"],
+    "ifs": ["BARNSLEY_FERN", "ifs_batches", "ifs_density"],
+    "koch": ["draw_koch", "koch_polygon", "koch_snowflake"],
+    "sierpinski": ["sierpinski_levels"],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+# Importing a submodule binds it as a package attribute, which would replace a
+# function of the same name, so no submodule is named like an export
+assert not set(_EXPORTS) & set(_MODULE_OF)
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,133 @@
+import cmath
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+from .engine import (
+    complex_grid,
+    escape_time,
+    julia_grid,
+    linear_axis,
+    pick_precision,
+)
+from .palettes import colorize
+from .profiling import span
+from .tiled import get_pool
+
+# Frames smaller than this are rendered several to a task, as one
+# (frames, height, width) array through the engine; larger ones go one
+# frame per task
+BATCH_PIXELS = 1 << 20
+
+
+def circle_path(radius=0.7885, center=0j):
+    # c(t) = center + radius * e^(2 pi i t), the classic Julia morph
+    def c(t):
+        return center + radius * cmath.exp(2j * cmath.pi * t)
+
+    return c
+
+
+def cardioid_path(offset=0.02):
+    # Just outside the main cardioid of the Mandelbrot set, where the Julia
+    # sets change the most
+    def c(t):
+        w = cmath.exp(2j * cmath.pi * t)
+        return (1 + offset) * (w / 2 - w * w / 4)
+
+    return c
+
+
+def _render_frames(cs, views, width, height, max_iter, palette, precision):
+    # Runs in a pool worker: BGR frames of shape (len(cs), height, width, 3)
+    axes = [
+        (linear_axis(xmin, xmax, width), linear_axis(ymin, ymax, height))
+        for xmin, xmax, ymin, ymax in views
+    ]
+    if len(cs) == 1:
+        xs, ys = axes[0]
+        counts = julia_grid(cs[0], xs, ys, max_iter, precision=precision, symmetry=True)
+        counts = counts[np.newaxis]
+    else:
+        z = np.stack([complex_grid(xs, ys) for xs, ys in axes])
+        c = np.asarray(cs)[:, np.newaxis, np.newaxis]
+        counts = escape_time(z, c, max_iter, precision=precision)
+    return colorize(counts, max_iter, palette)
+
+
+def render_path(
+    c_path,
+    frames,
+    width,
+    height,
+    max_iter,
+    sink,
+    viewport=(-1.5, 1.5, -1.5, 1.5),
+    palette="hsv",
+    workers=None,
+    precision="auto",
+    batch_pixels=BATCH_PIXELS,
+):
+    # Julia animation along c_path(t), t = 0, 1/frames, ..., so a closed path
+    # loops seamlessly. viewport is a tuple or a function of t. c(t) and the
+    # viewports are evaluated here; workers get plain numbers and return
+    # colored frames, which are written to the sink in order as soon as
+    # every earlier frame is out.
+    workers = workers or os.cpu_count()
+    times = [k / frames for k in range(frames)]
+    cs = [complex(c_path(t)) for t in times]
+    views = [tuple(viewport(t) if callable(viewport) else viewport) for t in times]
+    per_task = max(1, batch_pixels // (width * height))
+
+    def tasks():
+        for first in range(0, frames, per_task):
+            batch = views[first:first + per_task]
+            p = precision
+            if p == "auto":
+                # One dtype per batch: the most demanding of its views
+                picks = {
+                    pick_precision(
+                        linear_axis(v[0], v[1], width), linear_axis(v[2], v[3], height)
+                    )
+                    for v in batch
+                }
+                p = "float64" if "float64" in picks else "float32"
+            yield first, (
+                cs[first:first + per_task], batch, width, height, max_iter,
+                palette, p,
+            )
+
+    pool = get_pool(workers)
+    in_flight = {}
+    ready = {}
+    written = 0
+    t = time.perf_counter()
+    pending = tasks()
+    exhausted = False
+    while not exhausted or in_flight:
+        # At most 2 * workers batches in flight or waiting for an earlier one
+        # keeps memory bounded. The next batch to write was submitted first,
+        # so it is always among them and the loop cannot stall.
+        while not exhausted and len(in_flight) + len(ready) < 2 * workers:
+            item = next(pending, None)
+            if item is None:
+                exhausted = True
+                break
+            first, args = item
+            in_flight[pool.submit(_render_frames, *args)] = first
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            ready[in_flight.pop(future)] = future.result()
+        while written in ready:
+            block = ready.pop(written)
+            with span("path_write", frames=len(block)):
+                for frame in block:
+                    sink.write(frame)
+            written += len(block)
+            print(f"Julia path: {written}/{frames} frames")
+
+    wall = time.perf_counter() - t
+    print(f"{frames} frames in {wall:.1f} s, {frames / wall:.2f} frames/s")
+    return wall
@@ -0,0 +1,241 @@
+import hashlib
+import heapq
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+from .chaos import chaos_game
+from .density import log_density, rasterize
+from .engine import julia_grid, linear_axis, mandelbrot_grid
+from .ifs import BARNSLEY_FERN, ifs_density
+from .koch import draw_koch
+from .palettes import colorize
+from .sinks import PngSink, VideoSink
+from .tiled import get_pool
+
+# A job is a dict, e.g.
+#   {"name": "julia_sweep", "fractal": "julia", "c": [-0.7, 0.27],
+#    "width": 1080, "height": 1080, "max_iters": [10, 20, 40],
+#    "palette": "hsv", "priority": 1,
+#    "sink": {"type": "video", "path": "out/julia.mp4", "fps": 15}}
+# Escape-time jobs render one frame per entry of "max_iters" (or a single
+# frame at "max_iter"); the other fractals render a single frame.
+VIEWPORTS = {
+    "mandelbrot": (-2.0, 1.0, -1.5, 1.5),
+    "julia": (-1.5, 1.5, -1.5, 1.5),
+}
+FRACTALS = ("mandelbrot", "julia", "sierpinski", "barnsley", "koch")
+
+
+def job_frames(job):
+    if job["fractal"] in VIEWPORTS:
+        return len(job.get("max_iters", [job.get("max_iter", 100)]))
+    return 1
+
+
+def job_key(job):
+    # Hash of everything that shapes the output, to tell whether a saved
+    # progress entry still belongs to this job
+    spec = {k: v for k, v in job.items() if k != "priority"}
+    blob = json.dumps(spec, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def render_frame(job, index):
+    # One BGR frame of a job; runs in a pool worker, never opens a window
+    kind = job["fractal"]
+    width, height = job["width"], job["height"]
+    color = tuple(job.get("color", (0, 255, 0)))
+    if kind in VIEWPORTS:
+        max_iter = job.get("max_iters", [job.get("max_iter", 100)])[index]
+        xmin, xmax, ymin, ymax = job.get("viewport", VIEWPORTS[kind])
+        xs = linear_axis(xmin, xmax, width)
+        ys = linear_axis(ymin, ymax, height)
+        precision = job.get("precision", "auto")
+        if kind == "mandelbrot":
+            counts = mandelbrot_grid(
+                xs, ys, max_iter, shortcuts=True, precision=precision,
+                symmetry=True,
+            )
+        else:
+            c = complex(*job.get("c", (-0.7, 0.27)))
+            counts = julia_grid(
+                c, xs, ys, max_iter, precision=precision, symmetry=True
+            )
+        return colorize(counts, max_iter, job.get("palette", "hsv"))
+    if kind == "sierpinski":
+        margin = job.get("margin", 50)
+        vertices = [
+            (width // 2, margin),
+            (margin, height - margin),
+            (width - margin, height - margin),
+        ]
+        n_points = job.get("n_points", 1_000_000)
+        density = chaos_game(
+            vertices, n_points, (height, width), seed=job.get("seed")
+        )
+        return rasterize(density, color, dot_radius=1)
+    if kind == "barnsley":
+        n_points = job.get("n_points", 10_000_000)
+        density = ifs_density(
+            BARNSLEY_FERN, n_points, (height, width), seed=job.get("seed")
+        )
+        return log_density(density, color)
+    if kind == "koch":
+        img = np.zeros((height, width, 3), dtype=np.uint8)
+        radius = job.get("radius", min(width, height) * 3 // 8)
+        center = (width // 2, height // 2)
+        return draw_koch(img, job.get("depth", 4), center, radius, (255, 255, 255))
+    raise ValueError(f"unknown fractal {kind!r}, expected one of {FRACTALS}")
+
+
+def open_sink(job, start=0):
+    sink = job.get("sink", {"type": "png", "path": job["name"]})
+    if sink["type"] == "png":
+        return PngSink(sink["path"], start=start)
+    if sink["type"] == "video":
+        folder = os.path.dirname(os.path.abspath(sink["path"]))
+        os.makedirs(folder, exist_ok=True)
+        return VideoSink(sink["path"], fps=sink.get("fps", 15))
+    raise ValueError(f"unknown sink {sink['type']!r}, expected 'png' or 'video'")
+
+
+class BatchRunner:
+    # Runs many jobs through one process pool. Frames of all jobs wait in a
+    # priority queue (higher "priority" first, then spec order) and at most
+    # 2 * workers are in flight, so jobs overlap and every worker stays busy.
+    # Finished frames are written in order per job; progress is checkpointed
+    # so a rerun skips completed jobs and continues PNG jobs where they
+    # stopped (a video cannot be appended to and restarts).
+
+    def __init__(self, jobs, workers=None, state_path=None):
+        names = [job["name"] for job in jobs]
+        if len(set(names)) != len(names):
+            raise ValueError("job names must be unique")
+        for job in jobs:
+            if job["fractal"] not in FRACTALS:
+                raise ValueError(
+                    f"{job['name']}: unknown fractal {job['fractal']!r},"
+                    f" expected one of {FRACTALS}"
+                )
+        self.jobs = jobs
+        self.workers = workers or os.cpu_count()
+        self.state_path = state_path
+        self.progress = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path) as f:
+                self.progress = json.load(f)
+
+    def _save_progress(self):
+        if self.state_path:
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.progress, f, indent=1)
+            os.replace(tmp, self.state_path)
+
+    def _resume_point(self, job):
+        saved = self.progress.get(job["name"])
+        if saved is None or saved["key"] != job_key(job):
+            return 0
+        if saved["done"] == job_frames(job):
+            return saved["done"]
+        is_png = job.get("sink", {"type": "png"})["type"] == "png"
+        return saved["done"] if is_png else 0
+
+    def run(self):
+        pool = get_pool(self.workers)
+        queue = []
+        running = {}
+        for order, job in enumerate(self.jobs):
+            start = self._resume_point(job)
+            total = job_frames(job)
+            if start == total:
+                print(f"{job['name']}: already complete, skipped")
+                continue
+            running[job["name"]] = {
+                "job": job,
+                "sink": None,  # opened on the first write, see _flush
+                "next": start,
+                "ready": {},
+                "total": total,
+                "frames": 0,
+                "started": None,
+            }
+            for index in range(start, total):
+                heapq.heappush(queue, (-job.get("priority", 0), order, index))
+
+        reports = []
+        in_flight = {}
+        buffered = 0  # finished frames waiting for an earlier frame of their job
+        try:
+            while queue or in_flight:
+                # Frames in flight and buffered count against the same cap, so
+                # a slow frame cannot make the others pile up. Each job's next
+                # frame was submitted before its buffered ones, so it is in
+                # flight and the loop cannot stall.
+                while queue and len(in_flight) + buffered < 2 * self.workers:
+                    _, order, index = heapq.heappop(queue)
+                    job = self.jobs[order]
+                    run = running[job["name"]]
+                    if run["started"] is None:
+                        run["started"] = time.perf_counter()
+                    future = pool.submit(render_frame, job, index)
+                    in_flight[future] = (job["name"], index)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, index = in_flight.pop(future)
+                    run = running[name]
+                    run["ready"][index] = future.result()
+                    buffered += 1
+                    written = run["next"]
+                    report = self._flush(run)
+                    buffered -= run["next"] - written
+                    if report:
+                        reports.append(report)
+        finally:
+            for run in running.values():
+                if run["sink"] is not None:
+                    run["sink"].close()
+        return reports
+
+    def _flush(self, run):
+        # Writes the frames that are next in line; returns the job report
+        # once its last frame is out
+        job = run["job"]
+        if run["sink"] is None and run["next"] in run["ready"]:
+            # Only now: a video sink starts a thread, which a forked worker
+            # must not inherit. ProcessPoolExecutor starts workers on submit
+            # while none is idle, and run() makes its first round of up to
+            # 2 * workers submissions before any sink is opened; that round
+            # starts every worker, or all that are needed when there are
+            # fewer frames
+            run["sink"] = open_sink(job, run["next"])
+        while run["next"] in run["ready"]:
+            frame = run["ready"].pop(run["next"])
+            run["sink"].write(frame)
+            run["next"] += 1
+            run["frames"] += 1
+            self.progress[job["name"]] = {"key": job_key(job), "done": run["next"]}
+            self._save_progress()
+        if run["next"] < run["total"]:
+            return None
+
+        run["sink"].close()
+        wall = time.perf_counter() - run["started"]
+        pixels = run["frames"] * job["width"] * job["height"]
+        report = {
+            "name": job["name"],
+            "frames": run["frames"],
+            "wall_s": wall,
+            "frames_per_s": run["frames"] / wall,
+            "mpixels_per_s": pixels / wall / 1e6,
+        }
+        print(
+            f"{job['name']}: {run['frames']} frame(s) in {wall:.2f} s,"
+            f" {report['frames_per_s']:.2f} frames/s,"
+            f" {report['mpixels_per_s']:.1f} Mpixel/s"
+        )
+        return report
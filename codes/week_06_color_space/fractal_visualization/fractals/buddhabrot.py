@@ -0,0 +1,290 @@
+import json
+import os
+import time
+from concurrent.futures import wait
+
+import numpy as np
+
+from .engine import mandelbrot_points
+from .tiled import get_pool
+
+# The Buddhabrot plots where the orbits of escaping points go rather than how
+# fast they escape: every orbit point z_1 .. z_n of a sampled c lands in a
+# histogram. The anti-Buddhabrot plots the orbits that never escape.
+# Nebulabrot: one histogram per RGB channel, each for its own band
+# (lo, hi) of escape iterations.
+NEBULA_BANDS = ((0, 2000), (0, 200), (0, 20))  # R, G, B
+BUDDHA_VIEW = (-2.0, 1.0, -1.5, 1.5)
+SAMPLE_BOUNDS = (-2.0, 2.0, -2.0, 2.0)  # |c| > 2 escapes at once
+
+SAMPLE_BATCH = 65536  # c values per uniform batch
+MH_CHAINS = 2048  # Metropolis-Hastings chains advanced together
+UNIFORM_PROPOSALS = 0.2  # share of fresh uniform proposals, against mutations
+MUTATION_PIXELS = 4.0  # standard deviation of a mutation, in view pixels
+CHECKPOINT_SECONDS = 60.0
+
+
+def _qualify(counts, bands, anti, max_iter):
+    # (samples, channels) mask of the bands each orbit counts for, and how
+    # many steps of it each channel records
+    lo = np.array([b[0] for b in bands])
+    hi = np.array([b[1] for b in bands])
+    n = counts[:, np.newaxis].astype(np.int64)
+    if anti:
+        # Still bounded after hi iterations: its first hi points
+        mask = n >= np.minimum(hi, max_iter)
+        lengths = np.where(mask, hi, 0).max(axis=1)
+    else:
+        mask = (n >= lo) & (n < hi) & (n < max_iter)
+        lengths = np.where(mask.any(axis=1), n[:, 0], 0)
+    return mask, lengths
+
+
+def _orbit_points(c, lengths, view, shape):
+    # Pixel index, orbit number and step of every orbit point inside the
+    # view, orbit j followed for lengths[j] steps. Orbits are sorted by
+    # length so the ones still running are always a prefix.
+    xmin, xmax, ymin, ymax = view
+    height, width = shape
+    sx = width / (xmax - xmin)
+    sy = height / (ymax - ymin)
+    order = np.argsort(-lengths, kind="stable")
+    lengths = lengths[order]
+    c = c[order]
+    z = np.zeros_like(c)
+    idx, ids, steps = [], [], []
+    m = np.count_nonzero(lengths)
+    for step in range(1, int(lengths[0]) + 1 if m else 1):
+        while lengths[m - 1] < step:
+            m -= 1
+        zm = z[:m]
+        np.multiply(zm, zm, out=zm)
+        np.add(zm, c[:m], out=zm)
+        col = (zm.real - xmin) * sx
+        row = (zm.imag - ymin) * sy
+        inside = np.flatnonzero(
+            (col >= 0) & (col < width) & (row >= 0) & (row < height)
+        )
+        if inside.size:
+            pixel = row[inside].astype(np.int64) * width + col[inside].astype(np.int64)
+            idx.append(pixel)
+            ids.append(order[inside])
+            steps.append(np.full(inside.size, step, dtype=np.int32))
+    if not idx:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty.astype(np.int32)
+    return np.concatenate(idx), np.concatenate(ids), np.concatenate(steps)
+
+
+class _Orbits:
+    # In-view orbit points of a batch of c: per channel, the pixel index and
+    # orbit number of each point; weight[j] is how many points orbit j left
+    # in the image over all channels
+
+    def __init__(self, spec, c):
+        max_iter = max(hi for _, hi in spec["bands"])
+        shape = (spec["height"], spec["width"])
+        counts = mandelbrot_points(c, max_iter, shortcuts=True)
+        mask, lengths = _qualify(counts, spec["bands"], spec["anti"], max_iter)
+        idx, ids, steps = _orbit_points(c, lengths, spec["view"], shape)
+        self.points = []
+        self.weight = np.zeros(len(c))
+        for k, (_, hi) in enumerate(spec["bands"]):
+            keep = mask[ids, k]
+            if spec["anti"]:
+                keep &= steps <= hi
+            self.points.append((idx[keep], ids[keep]))
+            self.weight += np.bincount(ids[keep], minlength=len(c))
+
+    def deposit(self, hist):
+        for k, (idx, _) in enumerate(self.points):
+            hist[k] += np.bincount(idx, minlength=hist.shape[1])
+
+
+def _uniform(rng, n, bounds):
+    xmin, xmax, ymin, ymax = bounds
+    return rng.uniform(xmin, xmax, n) + 1j * rng.uniform(ymin, ymax, n)
+
+
+class _Chains:
+    # Metropolis-Hastings over c with target f(c) = number of points the
+    # orbit leaves in the image, which concentrates the samples on the long
+    # orbits near the boundary that make the picture. Proposals mix fresh
+    # uniform samples with small Gaussian mutations (symmetric, so the
+    # acceptance is min(1, f'/f)). Every point is weighted 1/f, which makes
+    # the histogram an unbiased estimate of the uniform one up to scale.
+    # Expected-value recording: each step deposits the proposal with weight
+    # a and the current state with 1 - a. The in-view points of the current
+    # states are kept, so no orbit is ever iterated twice.
+
+    def __init__(self, spec, rng, c=None):
+        self.spec = spec
+        self.rng = rng
+        xmin, xmax, _, _ = spec["view"]
+        self.sigma = MUTATION_PIXELS * (xmax - xmin) / spec["width"]
+        if c is None:
+            c = self._seed(MH_CHAINS)
+        self.c = c
+        orbits = _Orbits(spec, c)
+        self.f = orbits.weight
+        self.points = orbits.points
+
+    def _seed(self, n):
+        # Uniform samples until n of them reach the image
+        found = []
+        while sum(len(c) for c in found) < n:
+            c = _uniform(self.rng, SAMPLE_BATCH, SAMPLE_BOUNDS)
+            found.append(c[_Orbits(self.spec, c).weight > 0])
+        return np.concatenate(found)[:n]
+
+    def step(self, hist):
+        n = len(self.c)
+        fresh = self.rng.random(n) < UNIFORM_PROPOSALS
+        proposal = self.c + self.sigma * (
+            self.rng.standard_normal(n) + 1j * self.rng.standard_normal(n)
+        )
+        fresh_c = _uniform(self.rng, np.count_nonzero(fresh), SAMPLE_BOUNDS)
+        proposal[fresh] = fresh_c
+        orbits = _Orbits(self.spec, proposal)
+        f_new = orbits.weight
+        accept = np.minimum(1.0, f_new / self.f)
+        moved = self.rng.random(n) < accept
+        new_scale = accept / np.maximum(f_new, 1)
+        old_scale = (1 - accept) / self.f
+        for k, ((idx, ids), (cur_idx, cur_ids)) in enumerate(
+            zip(orbits.points, self.points)
+        ):
+            # One bincount per channel for both deposits
+            weights = np.concatenate([new_scale[ids], old_scale[cur_ids]])
+            hist[k] += np.bincount(
+                np.concatenate([idx, cur_idx]), weights, minlength=hist.shape[1]
+            )
+            stay = ~moved[cur_ids]
+            take = moved[ids]
+            self.points[k] = (
+                np.concatenate([cur_idx[stay], idx[take]]),
+                np.concatenate([cur_ids[stay], ids[take]]),
+            )
+        self.c[moved] = proposal[moved]
+        self.f[moved] = f_new[moved]
+        return n
+
+
+def _spec_key(spec):
+    return json.dumps(spec, sort_keys=True)
+
+
+def _save(path, spec, hist, done, rng, chains):
+    tmp = f"{path}.tmp.npz"
+    extra = {} if chains is None else {"c": chains.c}
+    np.savez(
+        tmp,
+        hist=hist,
+        done=done,
+        rng=json.dumps(rng.bit_generator.state),
+        key=_spec_key(spec),
+        **extra,
+    )
+    os.replace(tmp, path)
+
+
+def _worker(spec, index, samples, seed, checkpoint, checkpoint_seconds):
+    # One process: its own histogram, merged by the parent at the end. With
+    # a checkpoint path the histogram, sample count, RNG and chain states are
+    # saved every checkpoint_seconds, and a rerun continues from them.
+    rng = np.random.default_rng(None if seed is None else [seed, index])
+    hist = np.zeros((len(spec["bands"]), spec["height"] * spec["width"]))
+    done = 0
+    chains = None
+    if checkpoint and os.path.exists(checkpoint):
+        data = np.load(checkpoint)
+        if str(data["key"]) == _spec_key(spec):
+            hist = data["hist"]
+            done = int(data["done"])
+            rng.bit_generator.state = json.loads(str(data["rng"]))
+            if "c" in data:
+                chains = _Chains(spec, rng, data["c"])
+    if spec["sampler"] == "mh" and chains is None and done < samples:
+        chains = _Chains(spec, rng)
+
+    last = time.perf_counter()
+    while done < samples:
+        if chains is not None:
+            done += chains.step(hist)
+        else:
+            n = min(SAMPLE_BATCH, samples - done)
+            _Orbits(spec, _uniform(rng, n, SAMPLE_BOUNDS)).deposit(hist)
+            done += n
+        if checkpoint and time.perf_counter() - last >= checkpoint_seconds:
+            _save(checkpoint, spec, hist, done, rng, chains)
+            print(f"worker {index}: {done}/{samples} samples, checkpointed")
+            last = time.perf_counter()
+    if checkpoint:
+        _save(checkpoint, spec, hist, done, rng, chains)
+    return hist
+
+
+def render_buddhabrot(
+    width,
+    height,
+    samples,
+    bands=NEBULA_BANDS,
+    view=BUDDHA_VIEW,
+    anti=False,
+    sampler="mh",
+    workers=None,
+    seed=None,
+    checkpoint_dir=None,
+    checkpoint_seconds=CHECKPOINT_SECONDS,
+):
+    # (channels, height, width) float64 orbit density, one channel per band.
+    # sampler: "mh" (Metropolis-Hastings) or "uniform". The samples are split
+    # over the workers; with checkpoint_dir each worker checkpoints there and
+    # a rerun with the same arguments resumes instead of starting over.
+    if sampler not in ("mh", "uniform"):
+        raise ValueError(f"sampler must be 'mh' or 'uniform', not {sampler!r}")
+    workers = workers or os.cpu_count()
+    spec = {
+        "width": width,
+        "height": height,
+        "bands": [list(b) for b in bands],
+        "view": list(view),
+        "anti": anti,
+        "sampler": sampler,
+        "seed": seed,
+    }
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    pool = get_pool(workers)
+    futures = []
+    for index in range(workers):
+        share = samples // workers + (index < samples % workers)
+        path = None
+        if checkpoint_dir:
+            path = os.path.join(checkpoint_dir, f"buddhabrot_{index}.npz")
+        futures.append(
+            pool.submit(
+                _worker, spec, index, share, seed, path, checkpoint_seconds
+            )
+        )
+    wait(futures)
+    hist = sum(future.result() for future in futures)
+    return hist.reshape(len(bands), height, width)
+
+
+def nebula_image(hist, gamma=2.0, percentile=99.9, black=50.0):
+    # BGR image from (R, G, B) channel densities: each channel is scaled so
+    # its `percentile` maps to full brightness and its `black` percentile
+    # (the haze of the short orbits, which is spread all over the view) to
+    # black, then gamma-compressed
+    img = np.zeros(hist.shape[1:] + (3,), dtype=np.float32)
+    for k, channel in enumerate(hist[:3]):
+        hits = channel[channel > 0]
+        if hits.size == 0:
+            continue
+        low, high = np.percentile(hits, [black, percentile])
+        level = np.clip((channel - low) / max(high - low, 1e-12), 0, 1)
+        img[..., 2 - k] = level ** (1 / gamma)
+    if len(hist) == 1:
+        img[...] = img[..., 2:3]  # a single band is drawn in gray
+    return (img * 255).astype(np.uint8)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import count_dtype, linear_axis, pick_precision
+from .profiling import count, span
+
+
+def render_key(
+    kind,
+    params,
+    viewport,
+    shape,
+    max_iter,
+    palette=None,
+    precision="float64",
+    shortcuts=False,
+    subdivide=False,
+):
+    # Hash of everything that determines the result. Iteration counts are
+    # keyed without a palette, so recoloring reuses them; colored images add
+    # the palette to the key. precision="auto" is keyed as what it picks for
+    # this view. float32, the shortcuts and subdivision can all change counts,
+    # so each has its own entry.
+    if precision == "auto":
+        xmin, xmax, ymin, ymax = viewport
+        precision = pick_precision(
+            linear_axis(xmin, xmax, shape[1]), linear_axis(ymin, ymax, shape[0])
+        )
+    desc = {
+        "kind": kind,
+        "params": {k: repr(v) for k, v in sorted(params.items())},
+        "viewport": [repr(float(v)) for v in viewport],
+        "shape": list(shape),
+        "max_iter": int(max_iter),
+        "palette": palette,
+        "precision": precision,
+        "shortcuts": bool(shortcuts),
+        "subdivide": bool(subdivide),
+    }
+    blob = json.dumps(desc, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def compact(counts, max_iter):
+    # Smallest unsigned dtype that still holds max_iter
+    return counts.astype(count_dtype(max_iter), copy=False)
+
+
+class RenderCache:
+    # Two tiers: a small in-memory LRU for interactive use and a directory of
+    # compressed .npz files with a byte budget and LRU eviction.
+
+    def __init__(self, folder, max_bytes=1 << 30, memory_items=16):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        entries = []
+        for name in os.listdir(folder):
+            if name.endswith(".npz"):
+                st = os.stat(os.path.join(folder, name))
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.npz")
+
+    @property
+    def disk_bytes(self):
+        return sum(self._disk.values())
+
+    @property
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def _remember(self, key, array):
+        self._memory[key] = array
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            count("cache_hits")
+            return self._memory[key]
+        if key in self._disk:
+            path = self._path(key)
+            try:
+                with np.load(path) as data:
+                    array = data["array"]
+                array.flags.writeable = False  # shared by every later hit
+            except (OSError, KeyError, ValueError):
+                # Removed or damaged behind our back; treat as a miss
+                del self._disk[key]
+            else:
+                os.utime(path)
+                self._disk.move_to_end(key)
+                self._remember(key, array)
+                self.stats["disk_hits"] += 1
+                count("cache_hits")
+                return array
+        self.stats["misses"] += 1
+        count("cache_misses")
+        return None
+
+    def put(self, key, array):
+        # The cache keeps (and hands out) a read-only copy; the caller's array
+        # stays writeable
+        array = np.array(array)
+        array.flags.writeable = False
+        self._remember(key, array)
+        path = self._path(key)
+        # Not ending in .npz, so a write cut short by a crash is not
+        # indexed as an entry by __init__
+        tmp = f"{path}.tmp"
+        with span("cache_write"):
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, array=array)
+            os.replace(tmp, path)
+        self._disk[key] = os.path.getsize(path)
+        self._disk.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        total = self.disk_bytes
+        while total > self.max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear_memory(self):
+        self._memory.clear()
@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+from .density import BATCH_POINTS, WALKERS, walk_density
+
+
+def regular_polygon(n, center, radius, rotation=-math.pi / 2):
+    # Vertices of a regular n-gon; the default rotation puts one vertex on top
+    # in image coordinates (y pointing down)
+    angles = rotation + 2 * math.pi * np.arange(n) / n
+    return np.stack(
+        [center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)],
+        axis=1,
+    )
+
+
+def chaos_game_batches(
+    vertices,
+    n_points,
+    shape,
+    ratio=0.5,
+    walkers=WALKERS,
+    seed=None,
+    batch_points=BATCH_POINTS,
+):
+    # Many independent walkers advance in lockstep. Each step every walker
+    # jumps `ratio` of the way towards a randomly chosen vertex and its pixel
+    # is counted in a density histogram. Yields the (height, width) uint32
+    # density after every batch.
+    # ratio=1/2 on a triangle is the Sierpinski triangle; a square plus its
+    # center at 2/3 gives the Vicsek fractal, a pentagon at 0.618 a pentaflake.
+    rng = np.random.default_rng(seed)
+    vertices = np.asarray(vertices, dtype=np.float64)
+    vx = vertices[:, 0] * ratio
+    vy = vertices[:, 1] * ratio
+    keep = 1 - ratio
+
+    def step(x, y):
+        k = rng.integers(0, len(vertices), len(x))
+        x *= keep
+        x += vx[k]
+        y *= keep
+        y += vy[k]
+
+    def transform(x, y):
+        return x, y  # vertices are given in pixels
+
+    x = rng.uniform(vertices[:, 0].min(), vertices[:, 0].max(), walkers)
+    y = rng.uniform(vertices[:, 1].min(), vertices[:, 1].max(), walkers)
+    return walk_density(step, x, y, n_points, shape, transform, batch_points)
+
+
+def chaos_game(vertices, n_points, shape, ratio=0.5, walkers=WALKERS, seed=None):
+    density = np.zeros(shape, dtype=np.uint32)  # n_points=0 yields no batch
+    for density in chaos_game_batches(
+        vertices, n_points, shape, ratio, walkers, seed
+    ):
+        pass
+    return density
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+
+WALKERS = 65536
+# Points binned into the histogram per np.bincount call
+BATCH_POINTS = 1 << 22
+# Steps every walker takes before its points count, to land on the attractor
+BURN_IN = 32
+
+
+def walk_density(step, x, y, n_points, shape, transform, batch_points=BATCH_POINTS):
+    # Streams the points of many walkers into a fixed-size uint32 histogram,
+    # so memory does not grow with n_points. step(x, y) advances all walkers
+    # in place; transform(x, y) -> (px, py) maps them to pixel coordinates.
+    # Yields the (height, width) density after every batch.
+    height, width = shape
+    walkers = len(x)
+    for _ in range(BURN_IN):
+        step(x, y)
+
+    density = np.zeros(height * width, dtype=np.uint32)
+    steps_per_batch = max(1, batch_points // walkers)
+    flat = np.empty((steps_per_batch, walkers), dtype=np.int64)
+    remaining = n_points
+    while remaining > 0:
+        steps = min(steps_per_batch, math.ceil(remaining / walkers))
+        for i in range(steps):
+            step(x, y)
+            px, py = transform(x, y)
+            # floor, not a cast: truncation would fold (-1, 0) into pixel 0
+            px = np.floor(px).astype(np.int64)
+            py = np.floor(py).astype(np.int64)
+            inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            flat[i] = np.where(inside, py * width + px, -1)
+        idx = flat[:steps].ravel()[: min(remaining, steps * walkers)]
+        idx = idx[idx >= 0]
+        density += np.bincount(idx, minlength=height * width).astype(np.uint32)
+        remaining -= steps * walkers
+        yield density.reshape(shape)
+
+
+def rasterize(density, color, dot_radius=0):
+    # One pass from the histogram to a BGR image; dot_radius > 0 splats every
+    # hit pixel into a disc (what cv2.circle did for each point)
+    import cv2
+
+    mask = (density > 0).astype(np.uint8)
+    if dot_radius > 0:
+        size = 2 * dot_radius + 1
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
+        mask = cv2.dilate(mask, kernel)
+    img = np.zeros(density.shape + (3,), dtype=np.uint8)
+    img[mask > 0] = color
+    return img
+
+
+def log_density(density, color, gamma=1.0):
+    # Log tone mapping: brightness follows log(1 + hits), scaled so the
+    # densest pixel gets the full color; keeps faint regions visible at
+    # any point count
+    level = np.log1p(density.astype(np.float32))
+    peak = level.max()
+    if peak > 0:
+        level /= peak
+    if gamma != 1.0:
+        level **= 1 / gamma
+    img = level[..., np.newaxis] * np.asarray(color, dtype=np.float32)
+    return img.astype(np.uint8)
@@ -0,0 +1,337 @@
+import os
+
+import numpy as np
+
+from .profiling import count
+
+
+def mandelbrot(c, max_iter):
+    # Scalar reference, kept to check the vectorized engine against
+    z = 0
+    n = 0
+    while abs(z) <= 2 and n < max_iter:
+        z = z * z + c
+        n += 1
+    return n
+
+
+def julia(c, z, max_iter):
+    n = 0
+    while abs(z) <= 2 and n < max_iter:
+        z = z * z + c
+        n += 1
+    return n
+
+
+def linear_axis(vmin, vmax, n):
+    # Same sample positions as `vmin + (vmax - vmin) * i / n` in the OpenCV scripts
+    return vmin + (vmax - vmin) * np.arange(n) / n
+
+
+def complex_grid(xs, ys, dtype=np.complex128):
+    # grid[i, j] = xs[j] + 1j * ys[i]
+    grid = np.empty((len(ys), len(xs)), dtype=dtype)
+    grid.real = np.asarray(xs)[np.newaxis, :]
+    grid.imag = np.asarray(ys)[:, np.newaxis]
+    return grid
+
+
+def count_dtype(max_iter):
+    # Smallest unsigned dtype that holds max_iter: uint8 up to 255, then uint16
+    return np.min_scalar_type(max_iter)
+
+
+# complex64 is used while a pixel step spans at least this many float32 ulps
+# of the coordinates, i.e. neighbouring pixels stay far apart in float32
+FLOAT32_MIN_ULPS = 1024
+COMPLEX_DTYPES = {"float32": np.complex64, "float64": np.complex128}
+
+
+def pick_precision(xs, ys):
+    # "float32" for shallow views, "float64" once the zoom gets deep
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    steps = [abs(a[1] - a[0]) for a in (xs, ys) if len(a) > 1]
+    if not steps:
+        return "float64"
+    extent = max(1.0, np.abs(xs).max(), np.abs(ys).max())
+    ulp = extent * np.finfo(np.float32).eps
+    return "float32" if min(steps) >= FLOAT32_MIN_ULPS * ulp else "float64"
+
+
+def _complex_dtype(precision, xs=None, ys=None):
+    if precision == "auto":
+        precision = pick_precision(xs, ys)
+    if precision not in COMPLEX_DTYPES:
+        raise ValueError(
+            f"precision must be 'auto', 'float32' or 'float64', not {precision!r}"
+        )
+    return COMPLEX_DTYPES[precision]
+
+
+# Pixels are iterated in blocks small enough to stay in cache
+BLOCK_SIZE = 65536
+
+
+# Orbits that come back within this distance of an earlier point are treated
+# as trapped in a cycle (inside the set)
+PERIOD_TOLERANCE = 1e-13
+
+
+def _escape_block(z, c, counts, max_iter, start=0, active=None, periodicity=False):
+    # Indices of the pixels that have not escaped yet; escaped pixels drop out
+    # of the work so late iterations only touch the (shrinking) active set.
+    # z and c hold the values of the active pixels only.
+    if active is None:
+        active = np.arange(z.size)
+    if periodicity:
+        # Brent-style cycle check: compare against the orbit point saved at
+        # the last power-of-two iteration. Cycled pixels keep counts=max_iter.
+        saved = z.copy()
+    pixels = z.size
+    iterations = 0
+
+    for n in range(start, max_iter):
+        keep = np.abs(z) <= 2
+        if not keep.all():
+            counts[active[~keep]] = n
+        if periodicity and n > start:
+            keep &= np.abs(z - saved) >= PERIOD_TOLERANCE
+        if not keep.all():
+            active = active[keep]
+            z = z[keep]
+            if not isinstance(c, complex):
+                c = c[keep]
+            if periodicity:
+                saved = saved[keep]
+            if active.size == 0:
+                break
+        if periodicity and n & (n - 1) == 0:
+            saved[...] = z
+        np.multiply(z, z, out=z)
+        z += c
+        iterations += z.size
+
+    count("pixels", pixels)
+    count("iterations", iterations)
+    count("early_exits", pixels - active.size)  # escaped or caught in a cycle
+    return active, z
+
+
+def escape_time(z, c, max_iter, periodicity=False, precision="float64"):
+    # precision "float32" iterates in complex64: half the memory traffic and
+    # twice the SIMD width, for views where float32 still resolves the pixels
+    dtype = _complex_dtype(precision)
+    z = np.array(z, dtype=dtype)  # private copy, iterated in place
+    shape = z.shape
+    z = z.ravel()
+    if np.ndim(c) == 0:
+        c = complex(c)
+    else:
+        c = np.broadcast_to(np.asarray(c, dtype=dtype), shape).ravel()
+
+    counts = np.full(z.size, max_iter, dtype=count_dtype(max_iter))
+    for start in range(0, z.size, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        _escape_block(
+            z[block],
+            c if isinstance(c, complex) else c[block],
+            counts[block],
+            max_iter,
+            periodicity=periodicity,
+        )
+
+    return counts.reshape(shape)
+
+
+def in_main_bulbs(c):
+    # Closed-form membership of the main cardioid and the period-2 bulb
+    x, y = c.real, c.imag
+    y2 = y * y
+    q = (x - 0.25) ** 2 + y2
+    cardioid = q * (q + (x - 0.25)) <= 0.25 * y2
+    bulb = (x + 1) ** 2 + y2 <= 0.0625
+    return cardioid | bulb
+
+
+def mandelbrot_points(c, max_iter, shortcuts=False, precision="float64"):
+    # shortcuts: skip the main cardioid / period-2 bulb and stop orbits that
+    # fall into a cycle; both only affect points inside the set
+    c = np.asarray(c, dtype=_complex_dtype(precision))
+    if not shortcuts:
+        return escape_time(np.zeros_like(c), c, max_iter, precision=precision)
+
+    counts = np.full(c.shape, max_iter, dtype=count_dtype(max_iter))
+    outside = ~in_main_bulbs(c)
+    count("bulb_skips", outside.size - np.count_nonzero(outside))
+    counts[outside] = escape_time(
+        np.zeros(np.count_nonzero(outside), dtype=c.dtype),
+        c[outside],
+        max_iter,
+        periodicity=True,
+        precision=precision,
+    )
+    return counts
+
+
+def mandelbrot_grid(
+    xs,
+    ys,
+    max_iter,
+    workers=1,
+    shortcuts=False,
+    precision="float64",
+    symmetry=False,
+):
+    # precision: "float32", "float64" or "auto" (from the pixel spacing);
+    # symmetry: compute one half of a view centered on the real axis and
+    # mirror it (see symmetry.py)
+    if precision == "auto":
+        precision = pick_precision(xs, ys)
+    if symmetry:
+        from .symmetry import symmetric_render
+
+        def render(xs, ys):
+            return mandelbrot_grid(xs, ys, max_iter, workers, shortcuts, precision)
+
+        return symmetric_render(render, "mandelbrot", None, xs, ys)
+    if workers != 1:
+        from .tiled import render_tiled
+
+        return render_tiled(
+            "mandelbrot", None, xs, ys, max_iter, workers,
+            shortcuts=shortcuts, precision=precision,
+        )
+    grid = complex_grid(xs, ys, _complex_dtype(precision))
+    return mandelbrot_points(grid, max_iter, shortcuts, precision)
+
+
+def julia_grid(
+    c, xs, ys, max_iter, workers=1, precision="float64", symmetry=False
+):
+    if precision == "auto":
+        precision = pick_precision(xs, ys)
+    if symmetry:
+        from .symmetry import symmetric_render
+
+        def render(xs, ys):
+            return julia_grid(c, xs, ys, max_iter, workers, precision)
+
+        return symmetric_render(render, "julia", c, xs, ys)
+    if workers != 1:
+        from .tiled import render_tiled
+
+        return render_tiled(
+            "julia", c, xs, ys, max_iter, workers, precision=precision
+        )
+    grid = complex_grid(xs, ys, _complex_dtype(precision))
+    return escape_time(grid, c, max_iter, precision=precision)
+
+
+def _advance_block(z, c, max_iter, start):
+    # Worker side of EscapeState.advance(workers > 1): one block of bounded
+    # pixels, returned as the indices still bounded, their z and the counts
+    # of the others
+    counts = np.zeros(z.size, dtype=np.int64)
+    active, z = _escape_block(z, c, counts, max_iter, start)
+    return active, z, counts
+
+
+class EscapeState:
+    # Resumable escape-time iteration. Escape counts do not depend on max_iter,
+    # so a sweep over growing max_iter only runs the extra iterations for the
+    # pixels that are still bounded, and any lower max_iter is read back for free.
+
+    def __init__(self, z, c, key=""):
+        z = np.array(z, dtype=np.complex128)
+        self.shape = z.shape
+        self.z = z.ravel()
+        if np.ndim(c) == 0:
+            self.c = complex(c)
+        else:
+            self.c = np.broadcast_to(np.asarray(c, dtype=np.complex128), self.shape)
+            self.c = self.c.ravel()
+        self.counts = np.zeros(self.z.size, dtype=np.int64)
+        self.escaped = np.zeros(self.z.size, dtype=bool)
+        self.max_iter = 0
+        self.key = key  # free-form description of what is being rendered
+
+    def _c(self, idx):
+        return self.c if isinstance(self.c, complex) else self.c[idx]
+
+    @classmethod
+    def for_mandelbrot(cls, xs, ys, key=""):
+        c = complex_grid(xs, ys)
+        return cls(np.zeros_like(c), c, key)
+
+    @classmethod
+    def for_julia(cls, c, xs, ys, key=""):
+        return cls(complex_grid(xs, ys), c, key)
+
+    def advance(self, max_iter, workers=1):
+        # workers > 1 spreads the blocks of still bounded pixels over the
+        # shared process pool of fractals.tiled
+        if max_iter > self.max_iter:
+            bounded = np.flatnonzero(~self.escaped)
+            blocks = [
+                bounded[start:start + BLOCK_SIZE]
+                for start in range(0, bounded.size, BLOCK_SIZE)
+            ]
+            if workers != 1 and len(blocks) > 1:
+                from .tiled import get_pool
+
+                pool = get_pool(workers)
+                futures = [
+                    pool.submit(
+                        _advance_block, self.z[idx], self._c(idx), max_iter,
+                        self.max_iter,
+                    )
+                    for idx in blocks
+                ]
+                for idx, future in zip(blocks, futures):
+                    active, z, counts = future.result()
+                    gone = np.ones(idx.size, dtype=bool)
+                    gone[active] = False
+                    self.counts[idx[gone]] = counts[gone]
+                    self.escaped[idx[gone]] = True
+                    self.z[idx[active]] = z
+            else:
+                for idx in blocks:
+                    active, z = _escape_block(
+                        self.z[idx], self._c(idx), self.counts, max_iter,
+                        self.max_iter, idx,
+                    )
+                    self.escaped[idx] = True
+                    self.escaped[active] = False
+                    self.z[active] = z
+            self.max_iter = max_iter
+
+        done = self.escaped & (self.counts < max_iter)
+        counts = np.where(done, self.counts, max_iter).astype(count_dtype(max_iter))
+        return counts.reshape(self.shape)
+
+    def save(self, path):
+        # Written to a temporary file first so an interrupted save never
+        # leaves a truncated checkpoint behind
+        tmp = f"{path}.tmp.npz"
+        c = self.c if isinstance(self.c, complex) else self.c.reshape(self.shape)
+        np.savez(
+            tmp,
+            z=self.z.reshape(self.shape),
+            c=c,
+            counts=self.counts,
+            escaped=self.escaped,
+            max_iter=self.max_iter,
+            key=self.key,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        c = data["c"]
+        state = cls(data["z"], c[()] if c.ndim == 0 else c, str(data["key"]))
+        state.counts = data["counts"]
+        state.escaped = data["escaped"]
+        state.max_iter = int(data["max_iter"])
+        return state
@@ -0,0 +1,192 @@
+import threading
+
+import numpy as np
+
+from .engine import count_dtype, escape_time, mandelbrot_points, pick_precision
+from .palettes import colorize
+from .previews import STRIDES
+
+# Pixels per background batch: small enough that a view change cancels the
+# obsolete refinement within a few milliseconds
+REFINE_CHUNK = 16384
+
+# Old samples are kept after a zoom when they sit this close (in pixels) to
+# a new sample position
+REUSE_TOLERANCE = 1e-6
+
+
+def _shift(a, dy, dx, fill):
+    # a moved by (dy, dx) pixels; the uncovered strips hold `fill`
+    out = np.full_like(a, fill)
+    h, w = a.shape
+    if abs(dy) < h and abs(dx) < w:
+        out[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = a[
+            max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)
+        ]
+    return out
+
+
+def _resample_axis(n, shift, factor):
+    # Old pixel nearest to each new one, whether it lies inside the old
+    # view, and whether it sits exactly on the new sample position
+    u = n / 2 + shift + (np.arange(n) - n / 2) * factor
+    nearest = np.rint(u)
+    inside = (nearest >= 0) & (nearest < n)
+    exact = inside & (np.abs(u - nearest) < REUSE_TOLERANCE)
+    return np.clip(nearest, 0, n - 1).astype(np.intp), inside, exact
+
+
+class Explorer:
+    # State of an interactive pan/zoom view. Pixel (i, j) samples
+    # center + ((j - width / 2) + 1j * (i - height / 2)) * scale. A
+    # background thread computes the pixels the view does not know yet,
+    # coarse to fine like progressive(); every pan or zoom bumps the
+    # generation, which cancels the batch in flight.
+    #   pan(): shifts the iteration buffer, only the exposed strips are new
+    #   zoom(): resamples the buffer as an instant preview, keeps the samples
+    #           that land exactly on new pixels and refines the rest
+
+    def __init__(
+        self, kind, width, height, center, scale, max_iter, c=None, shortcuts=True
+    ):
+        self.kind = kind
+        self.c = c
+        self.width = width
+        self.height = height
+        self.center = complex(center)
+        self.scale = scale
+        self.max_iter = max_iter
+        self.shortcuts = shortcuts
+        self.counts = np.zeros((height, width), dtype=count_dtype(max_iter))
+        self.known = np.zeros((height, width), dtype=bool)
+        self.generation = 0
+        self.closed = False
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._idle = threading.Event()
+        self._thread = threading.Thread(target=self._refine, daemon=True)
+        self._thread.start()
+
+    def _changed(self):
+        # Caller holds the lock
+        self.generation += 1
+        self._dirty = True
+        self._idle.clear()
+        self._wake.notify()
+
+    def pan(self, dx, dy):
+        # Drag by (dx, dy) screen pixels: the picture follows the mouse
+        dx, dy = int(round(dx)), int(round(dy))
+        if dx == 0 and dy == 0:
+            return
+        with self._lock:
+            self.center -= complex(dx, dy) * self.scale
+            self.counts = _shift(self.counts, dy, dx, 0)
+            self.known = _shift(self.known, dy, dx, False)
+            self._changed()
+
+    def zoom(self, factor, at=None):
+        # factor < 1 zooms in; the point under `at` (screen pixel) stays put
+        mx, my = at if at is not None else (self.width / 2, self.height / 2)
+        with self._lock:
+            anchor = complex(mx - self.width / 2, my - self.height / 2)
+            shift = anchor * (1 - factor)  # in old pixels
+            cols, inside_x, exact_x = _resample_axis(self.width, shift.real, factor)
+            rows, inside_y, exact_y = _resample_axis(self.height, shift.imag, factor)
+            self.center += shift * self.scale
+            self.scale *= factor
+            # Two separable gathers, much cheaper than one 2-D fancy index
+            counts = self.counts.take(rows, axis=0).take(cols, axis=1)
+            counts[~inside_y] = 0
+            counts[:, ~inside_x] = 0
+            known = self.known.take(rows, axis=0).take(cols, axis=1)
+            known[~exact_y] = False
+            known[:, ~exact_x] = False
+            self.counts, self.known = counts, known
+            self._changed()
+
+    def set_max_iter(self, max_iter):
+        with self._lock:
+            self.max_iter = max_iter
+            self.counts = np.zeros_like(self.counts, dtype=count_dtype(max_iter))
+            self.known[...] = False
+            self._changed()
+
+    def reset(self, center, scale):
+        with self._lock:
+            self.center = complex(center)
+            self.scale = scale
+            self.known[...] = False
+            self._changed()
+
+    def image(self, palette="hsv"):
+        with self._lock:
+            counts, max_iter = self.counts.copy(), self.max_iter
+        return colorize(counts, max_iter, palette)
+
+    @property
+    def done(self):
+        return self._idle.is_set()
+
+    def wait(self, timeout=None):
+        # Blocks until the current view is fully refined
+        return self._idle.wait(timeout)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._wake.notify()
+        self._thread.join()
+
+    def _evaluate(self, points, max_iter, precision):
+        if self.kind == "mandelbrot":
+            return mandelbrot_points(points, max_iter, self.shortcuts, precision)
+        return escape_time(points, self.c, max_iter, precision=precision)
+
+    def _refine(self):
+        while True:
+            with self._wake:
+                while not self._dirty and not self.closed:
+                    self._idle.set()
+                    self._wake.wait()
+                if self.closed:
+                    return
+                self._dirty = False
+                generation = self.generation
+                center, scale, max_iter = self.center, self.scale, self.max_iter
+                todo = ~self.known
+            xs = center.real + (np.arange(self.width) - self.width / 2) * scale
+            ys = center.imag + (np.arange(self.height) - self.height / 2) * scale
+            precision = pick_precision(xs, ys)
+            self._refine_view(generation, xs, ys, max_iter, precision, todo)
+
+    def _refine_view(self, generation, xs, ys, max_iter, precision, todo):
+        for s in STRIDES:
+            rows, cols = np.nonzero(todo[::s, ::s])
+            rows *= s
+            cols *= s
+            for start in range(0, rows.size, REFINE_CHUNK):
+                if self.generation != generation:
+                    return
+                r = rows[start:start + REFINE_CHUNK]
+                q = cols[start:start + REFINE_CHUNK]
+                values = self._evaluate(xs[q] + 1j * ys[r], max_iter, precision)
+                with self._lock:
+                    if self.generation != generation:
+                        return
+                    if s > 1:
+                        self._preview_blocks(r, q, values, s)
+                    self.counts[r, q] = values
+                    self.known[r, q] = True
+                todo[r, q] = False
+
+    def _preview_blocks(self, rows, cols, values, s):
+        # Coarse samples stand in for the unknown pixels of their s x s block
+        for dy in range(s):
+            for dx in range(s):
+                r, q = rows + dy, cols + dx
+                keep = (r < self.height) & (q < self.width)
+                r, q, v = r[keep], q[keep], values[keep]
+                unknown = ~self.known[r, q]
+                self.counts[r[unknown], q[unknown]] = v[unknown]
@@ -0,0 +1,224 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+from .engine import (
+    count_dtype,
+    julia_grid,
+    linear_axis,
+    mandelbrot_grid,
+    pick_precision,
+)
+from .palettes import colorize
+from .profiling import count
+from .tiled import get_pool, iter_tiles
+
+# Out-of-core rendering: iteration counts go to a memory-mapped .npy file and
+# the colored image only ever exists as a Deep Zoom pyramid of small tiles,
+#   <out_dir>/fractal.dzi
+#   <out_dir>/fractal_files/<level>/<col>_<row>.png
+# Level max_level is full resolution, each level below halves the previous
+# one down to a single pixel (the layout OpenSeadragon and friends read).
+# Memory is bounded by tile size, whatever the image size.
+PYRAMID_TILE = 256
+
+
+def pyramid_levels(width, height):
+    # (level, width, height), full resolution first
+    max_level = (max(width, height) - 1).bit_length()
+    levels = []
+    for level in range(max_level, -1, -1):
+        scale = 1 << (max_level - level)
+        levels.append((level, -(-width // scale), -(-height // scale)))
+    return levels
+
+
+def _tile_path(tiles_dir, level, col, row, fmt):
+    return os.path.join(tiles_dir, str(level), f"{col}_{row}.{fmt}")
+
+
+def _write_tile(path, img):
+    import cv2
+
+    # Written under a temporary name and renamed, so a tile that exists is
+    # complete: after a crash, existing tiles are exactly the finished ones
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{ext}"
+    if not cv2.imwrite(tmp, img):
+        raise OSError(f"could not write {tmp}")
+    os.replace(tmp, path)
+
+
+def _base_tile(
+    counts_path, path, kind, c, xs, ys, max_iter, tile, shortcuts, precision,
+    palette,
+):
+    y0, y1, x0, x1 = tile
+    if kind == "mandelbrot":
+        block = mandelbrot_grid(
+            xs, ys, max_iter, shortcuts=shortcuts, precision=precision
+        )
+    else:
+        block = julia_grid(c, xs, ys, max_iter, precision=precision)
+    counts = np.load(counts_path, mmap_mode="r+")
+    counts[y0:y1, x0:x1] = block
+    counts.flush()
+    del counts
+    _write_tile(path, colorize(block, max_iter, palette))
+
+
+def _coarse_tile(tiles_dir, level, col, row, fine_cols, fine_rows, fmt):
+    import cv2
+
+    # 2x2 box filter over the (up to) four finer tiles below this one; an odd
+    # edge repeats its last pixel
+    rows = []
+    for r in range(2 * row, min(2 * row + 2, fine_rows)):
+        parts = [
+            cv2.imread(_tile_path(tiles_dir, level + 1, c, r, fmt))
+            for c in range(2 * col, min(2 * col + 2, fine_cols))
+        ]
+        rows.append(np.hstack(parts))
+    block = np.vstack(rows).astype(np.float32)
+    h, w = block.shape[:2]
+    block = np.pad(block, ((0, h % 2), (0, w % 2), (0, 0)), mode="edge")
+    block = block.reshape(block.shape[0] // 2, 2, block.shape[1] // 2, 2, 3)
+    img = np.rint(block.mean(axis=(1, 3))).astype(np.uint8)
+    _write_tile(_tile_path(tiles_dir, level, col, row, fmt), img)
+
+
+def _run_bounded(pool, fn, tasks, limit):
+    # Submits lazily with at most `limit` tasks in flight, so a level with
+    # 64k tiles never holds 64k futures
+    in_flight = set()
+    for args in tasks:
+        if len(in_flight) >= limit:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        in_flight.add(pool.submit(fn, *args))
+    for future in wait(in_flight)[0]:
+        future.result()
+
+
+def _check_manifest(out_dir, spec):
+    path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved != spec:
+            raise ValueError(
+                f"{out_dir} holds a different render ({path}); "
+                "use another output directory"
+            )
+        return
+    with open(path, "w") as f:
+        json.dump(spec, f, indent=1)
+
+
+def _write_dzi(path, width, height, tile_size, fmt):
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"'
+            f' Format="{fmt}" Overlap="0" TileSize="{tile_size}">\n'
+            f'  <Size Width="{width}" Height="{height}"/>\n'
+            "</Image>\n"
+        )
+
+
+def render_pyramid(
+    kind,
+    c,
+    viewport,
+    width,
+    height,
+    max_iter,
+    out_dir,
+    tile_size=PYRAMID_TILE,
+    palette="hsv",
+    fmt="png",
+    workers=None,
+    shortcuts=True,
+    precision="auto",
+):
+    # Renders the full-resolution level tile by tile through the process
+    # pool, then builds every coarser level from the one above it. Rerunning
+    # with the same arguments resumes: finished tiles are skipped.
+    workers = workers or os.cpu_count()
+    xmin, xmax, ymin, ymax = viewport
+    xs = linear_axis(xmin, xmax, width)
+    ys = linear_axis(ymin, ymax, height)
+    if precision == "auto":
+        # Decided once for the whole image, not per tile
+        precision = pick_precision(xs, ys)
+    os.makedirs(out_dir, exist_ok=True)
+    _check_manifest(out_dir, {
+        "kind": kind,
+        "c": None if c is None else [c.real, c.imag],
+        "viewport": [float(v) for v in viewport],
+        "width": width,
+        "height": height,
+        "max_iter": max_iter,
+        "tile_size": tile_size,
+        "palette": palette,
+        "format": fmt,
+        "shortcuts": shortcuts,
+        "precision": precision,
+    })
+
+    counts_path = os.path.join(out_dir, "counts.npy")
+    if not os.path.exists(counts_path):
+        # Sparse on disk until tiles fill it in
+        np.lib.format.open_memmap(
+            counts_path, mode="w+", dtype=count_dtype(max_iter), shape=(height, width)
+        ).flush()
+    tiles_dir = os.path.join(out_dir, "fractal_files")
+    levels = pyramid_levels(width, height)
+    for level, _, _ in levels:
+        os.makedirs(os.path.join(tiles_dir, str(level)), exist_ok=True)
+
+    pool = get_pool(workers)
+    limit = 2 * workers
+    top, _, _ = levels[0]
+    resumed = []
+
+    def base_tasks():
+        for tile in iter_tiles(height, width, tile_size):
+            y0, y1, x0, x1 = tile
+            path = _tile_path(tiles_dir, top, x0 // tile_size, y0 // tile_size, fmt)
+            if os.path.exists(path):
+                resumed.append(path)
+                continue
+            count("tiles_rendered")
+            yield (
+                counts_path, path, kind, c, xs[x0:x1], ys[y0:y1], max_iter,
+                tile, shortcuts, precision, palette,
+            )
+
+    t = time.perf_counter()
+    _run_bounded(pool, _base_tile, base_tasks(), limit)
+    count("tiles_resumed", len(resumed))
+    print(
+        f"level {top}: {width}x{height} in {time.perf_counter() - t:.2f} s"
+        f" ({len(resumed)} tiles resumed)"
+    )
+
+    for (level, w, h), (_, fine_w, fine_h) in zip(levels[1:], levels):
+        fine_cols = -(-fine_w // tile_size)
+        fine_rows = -(-fine_h // tile_size)
+        tasks = (
+            (tiles_dir, level, col, row, fine_cols, fine_rows, fmt)
+            for row in range(-(-h // tile_size))
+            for col in range(-(-w // tile_size))
+            if not os.path.exists(_tile_path(tiles_dir, level, col, row, fmt))
+        )
+        _run_bounded(pool, _coarse_tile, tasks, limit)
+
+    dzi_path = os.path.join(out_dir, "fractal.dzi")
+    _write_dzi(dzi_path, width, height, tile_size, fmt)
+    print(f"Pyramid of {len(levels)} levels written to {dzi_path}")
+    return dzi_path
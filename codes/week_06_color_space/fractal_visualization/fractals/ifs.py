@@ -0,0 +1,61 @@
+import numpy as np
+
+from .density import BATCH_POINTS, WALKERS, walk_density
+
+# An IFS is a table of affine maps  p -> matrix @ p + offset  with the
+# probability of picking each one
+BARNSLEY_FERN = {
+    "matrices": [
+        [[0.0, 0.0], [0.0, 0.16]],
+        [[0.85, 0.04], [-0.04, 0.85]],
+        [[0.2, -0.26], [0.23, 0.22]],
+        [[-0.15, 0.28], [0.26, 0.24]],
+    ],
+    "offsets": [[0.0, 0.0], [0.0, 1.6], [0.0, 1.6], [0.0, 0.44]],
+    "probabilities": [0.01, 0.85, 0.07, 0.07],
+    "bounds": (-3.0, 3.0, -2.0, 8.0),  # xmin, xmax, ymin, ymax of the view
+}
+
+
+def ifs_batches(
+    ifs,
+    n_points,
+    shape,
+    bounds=None,
+    walkers=WALKERS,
+    seed=None,
+    batch_points=BATCH_POINTS,
+):
+    # Iterates all walkers at once, each applying a randomly picked map per
+    # step, and streams the points into a uint32 density histogram (y up).
+    # Yields the density after every batch.
+    rng = np.random.default_rng(seed)
+    m = np.asarray(ifs["matrices"], dtype=np.float64)
+    a, b, c, d = m[:, 0, 0], m[:, 0, 1], m[:, 1, 0], m[:, 1, 1]
+    e, f = np.asarray(ifs["offsets"], dtype=np.float64).T
+    cumulative = np.cumsum(ifs["probabilities"], dtype=np.float64)
+    cumulative /= cumulative[-1]
+    xmin, xmax, ymin, ymax = bounds or ifs["bounds"]
+    height, width = shape
+
+    def step(x, y):
+        k = np.searchsorted(cumulative, rng.random(len(x)), side="right")
+        xn = a[k] * x + b[k] * y + e[k]
+        y[...] = c[k] * x + d[k] * y + f[k]
+        x[...] = xn
+
+    def transform(x, y):
+        px = width * (x - xmin) / (xmax - xmin)
+        py = height - height * (y - ymin) / (ymax - ymin)
+        return px, py
+
+    x = np.zeros(walkers)
+    y = np.zeros(walkers)
+    return walk_density(step, x, y, n_points, shape, transform, batch_points)
+
+
+def ifs_density(ifs, n_points, shape, bounds=None, walkers=WALKERS, seed=None):
+    density = np.zeros(shape, dtype=np.uint32)  # n_points=0 yields no batch
+    for density in ifs_batches(ifs, n_points, shape, bounds, walkers, seed):
+        pass
+    return density
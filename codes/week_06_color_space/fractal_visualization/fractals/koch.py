@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Sub-pixel bits handed to cv2.polylines / cv2.fillPoly
+SHIFT = 4
+
+# Each segment p -> q is replaced by four: the bump apex sits at
+# p + (q - p) * BUMP, i.e. a third of the way along rotated by -60 degrees,
+# which points outwards for a counter-clockwise outline
+BUMP = 0.5 - 0.5j * np.sqrt(3) / 3
+
+
+@lru_cache(maxsize=None)
+def koch_snowflake(order):
+    # Vertices of a unit-radius snowflake (complex, counter-clockwise, top
+    # vertex first) in float64. Every order is built from the cached one
+    # below it, so raising the order only does the work of the new level.
+    if order == 0:
+        points = np.exp(np.deg2rad(np.array([90.0, 210.0, 330.0])) * 1j)
+    else:
+        p1 = koch_snowflake(order - 1)
+        dp = np.roll(p1, -1) - p1
+        points = np.empty(len(p1) * 4, dtype=np.complex128)
+        points[::4] = p1
+        points[1::4] = p1 + dp / 3
+        points[2::4] = p1 + dp * BUMP
+        points[3::4] = p1 + dp / 3 * 2
+    points.flags.writeable = False
+    return points
+
+
+def koch_polygon(order, center, radius):
+    # (N, 2) float64 pixel coordinates, y pointing down
+    points = koch_snowflake(order)
+    return np.stack(
+        [center[0] + radius * points.real, center[1] - radius * points.imag], axis=1
+    )
+
+
+def draw_koch(
+    img, order, center, radius, color, thickness=1, fill=False, shift=SHIFT
+):
+    # The whole outline goes to OpenCV in one call, rounded to 1/2**shift of a
+    # pixel instead of being truncated to whole pixels at every level
+    import cv2
+
+    pts = koch_polygon(order, center, radius) * (1 << shift)
+    pts = np.round(pts).astype(np.int32)
+    # Deep orders put many vertices on the same sub-pixel; drop the repeats
+    keep = np.ones(len(pts), dtype=bool)
+    keep[1:] = (pts[1:] != pts[:-1]).any(axis=1)
+    pts = pts[keep]
+    if fill:
+        cv2.fillPoly(img, [pts], color, cv2.LINE_AA, shift)
+    else:
+        cv2.polylines(img, [pts], True, color, thickness, cv2.LINE_AA, shift)
+    return img
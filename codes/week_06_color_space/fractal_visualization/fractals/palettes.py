@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .profiling import span
+
+
+def hsv_ramp(max_iter):
+    # The ramp used by the OpenCV scripts: hue follows the count, the inside
+    # of the set (count == max_iter) gets value 0
+    import cv2
+
+    m = np.arange(max_iter + 1)
+    hsv = np.empty((max_iter + 1, 1, 3), dtype=np.uint8)
+    hsv[:, 0, 0] = (255 * m / max_iter).astype(np.int64).astype(np.uint8)
+    hsv[:, 0, 1] = 255
+    hsv[:, 0, 2] = np.where(m < max_iter, 255, 0)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[:, 0]
+
+
+def matplotlib_ramp(name):
+    def build(max_iter):
+        import matplotlib
+
+        rgba = matplotlib.colormaps[name](np.linspace(0, 1, max_iter + 1))
+        bgr = np.round(rgba[:, 2::-1] * 255).astype(np.uint8)
+        bgr[max_iter] = 0  # inside set = black
+        return bgr
+
+    return build
+
+
+PALETTES = {
+    "hsv": hsv_ramp,
+    "hot": matplotlib_ramp("hot"),
+    "magma": matplotlib_ramp("magma"),
+}
+
+
+def register_palette(name, build):
+    # build(max_iter) -> (max_iter + 1, 3) uint8 BGR table
+    PALETTES[name] = build
+    get_palette.cache_clear()
+
+
+@lru_cache(maxsize=128)
+def get_palette(name, max_iter):
+    # Built once per (palette, max_iter) and shared by every frame that uses it
+    lut = np.ascontiguousarray(PALETTES[name](max_iter), dtype=np.uint8)
+    transparent = np.all(lut == 0, axis=1)
+    lut.flags.writeable = False
+    transparent.flags.writeable = False
+    return lut, transparent
+
+
+def colorize(counts, max_iter, palette="hsv"):
+    with span("colorize"):
+        lut, _ = get_palette(palette, max_iter)
+        # np.take is several times faster than lut[counts] for a row gather
+        return np.take(lut, counts, axis=0)
+
+
+def overlay(img, counts, max_iter, palette="hsv"):
+    # Draw the fractal over img in place; black palette entries are
+    # transparent so the background shows through the inside of the set
+    with span("overlay"):
+        lut, transparent = get_palette(palette, max_iter)
+        np.copyto(
+            img,
+            np.take(lut, counts, axis=0),
+            where=~np.take(transparent, counts)[..., np.newaxis],
+        )
+    return img
@@ -0,0 +1,121 @@
+import math
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+from .engine import linear_axis
+
+# A zoom center lies on the set boundary, so a frame in which fewer pixels
+# than this escape was cut off by max_iter rather than being inside the set
+MIN_ESCAPED = 0.05
+
+
+def reference_orbit(cx, cy, max_iter, digits):
+    # Orbit of the frame center in arbitrary precision, rounded to complex128.
+    # Stops early if the center itself escapes; pixels rebase onto the start
+    # of the orbit when they run past its end.
+    with localcontext() as ctx:
+        ctx.prec = digits
+        cx, cy = Decimal(cx), Decimal(cy)
+        zr = zi = Decimal(0)
+        orbit = [0j]
+        for _ in range(max_iter):
+            zr, zi = zr * zr - zi * zi + cx, 2 * zr * zi + cy
+            z = complex(float(zr), float(zi))
+            orbit.append(z)
+            if abs(z) > 2:
+                break
+    return np.array(orbit, dtype=np.complex128)
+
+
+def perturbation_grid(orbit, dc, max_iter):
+    # Every pixel is iterated as a float64 delta against the reference orbit:
+    #   dz' = 2 Z_m dz + dz^2 + dc,  z = Z_m + dz
+    # Glitches (the delta losing precision as z comes close to 0, or the
+    # reference escaping first) are handled by rebasing: dz = z, m = 0.
+    shape = dc.shape
+    dc = dc.ravel()
+    dz = np.zeros_like(dc)
+    m = np.zeros(dc.size, dtype=np.int64)
+    counts = np.full(dc.size, max_iter, dtype=np.int64)
+    active = np.arange(dc.size)
+    last = len(orbit) - 1
+
+    for n in range(max_iter):
+        z = orbit[m] + dz
+        abs_z = np.abs(z)
+        bounded = abs_z <= 2
+        if not bounded.all():
+            counts[active[~bounded]] = n
+            active, dc, dz, m = active[bounded], dc[bounded], dz[bounded], m[bounded]
+            z, abs_z = z[bounded], abs_z[bounded]
+            if active.size == 0:
+                break
+        rebase = (abs_z < np.abs(dz)) | (m == last)
+        if rebase.any():
+            dz[rebase] = z[rebase]
+            m[rebase] = 0
+        dz = 2 * orbit[m] * dz + dz * dz + dc
+        m += 1
+
+    return counts.reshape(shape)
+
+
+def deep_mandelbrot(cx, cy, scale, width, height, max_iter):
+    # cx, cy: center as decimal strings (any number of digits);
+    # scale: width of the view in the complex plane, down to ~1e-300.
+    # The reference is iterated with all the digits of the center: rounded
+    # to the depth of the view, it escapes early close to the boundary and
+    # the pixels still following it lose their offset when they rebase.
+    given = max(len(Decimal(v).as_tuple().digits) for v in (cx, cy))
+    digits = max(20, int(-math.log10(scale)) + 20, given + 10)
+    orbit = reference_orbit(cx, cy, max_iter, digits)
+    half_w = scale / 2
+    half_h = scale * height / width / 2
+    dc = np.empty((height, width), dtype=np.complex128)
+    dc.real = linear_axis(-half_w, half_w, width)[np.newaxis, :]
+    dc.imag = linear_axis(-half_h, half_h, height)[:, np.newaxis]
+    return perturbation_grid(orbit, dc, max_iter)
+
+
+def zoom_schedule(start_scale, end_scale, frames, base_iter=200, iter_per_decade=200):
+    # Exponential zoom; max_iter grows linearly with the zoom depth. How many
+    # iterations a decade takes depends on the center: from ~10 next to a
+    # strongly repelling Misiurewicz point to several hundred in the valleys
+    # along the main cardioid.
+    for i in range(frames):
+        t = i / max(1, frames - 1)
+        log_scale = math.log10(start_scale) * (1 - t) + math.log10(end_scale) * t
+        depth = math.log10(start_scale) - log_scale
+        yield 10**log_scale, int(base_iter + iter_per_decade * depth)
+
+
+def deep_zoom(
+    cx,
+    cy,
+    start_scale,
+    end_scale,
+    frames,
+    width,
+    height,
+    base_iter=200,
+    iter_per_decade=200,
+    max_doublings=4,
+):
+    # Frames of an exponential zoom into (cx, cy) as (scale, max_iter, counts).
+    # A frame that comes out (almost) all interior is rendered again with
+    # twice the iterations, up to max_doublings times, and the later frames
+    # keep the added iterations.
+    extra = 0
+    for scale, max_iter in zoom_schedule(
+        start_scale, end_scale, frames, base_iter, iter_per_decade
+    ):
+        max_iter += extra
+        for doubling in range(max_doublings + 1):
+            counts = deep_mandelbrot(cx, cy, scale, width, height, max_iter)
+            escaped = np.count_nonzero(counts < max_iter)
+            if escaped >= MIN_ESCAPED * counts.size or doubling == max_doublings:
+                break
+            extra += max_iter
+            max_iter *= 2
+        yield scale, max_iter, counts
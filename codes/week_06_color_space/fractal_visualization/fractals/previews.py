@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+
+from .engine import complex_grid, escape_time, mandelbrot_points
+from .symmetry import symmetric_progressive
+
+# Sample spacing of each pass: 1/16 of the pixels, then 1/4, then all of them
+STRIDES = (4, 2, 1)
+# Pixels per batch; a preview can be shown between two batches
+CHUNK_PIXELS = 65536
+
+
+class Pacer:
+    # Paces preview updates by wall-clock time instead of pixel count
+
+    def __init__(self, hz=30):
+        self.interval = 1 / hz
+        self.last = None
+
+    def due(self):
+        now = time.perf_counter()
+        if self.last is None or now - self.last >= self.interval:
+            self.last = now
+            return True
+        return False
+
+
+def progressive(evaluate, xs, ys, strides=STRIDES, chunk_pixels=CHUNK_PIXELS):
+    # Renders coarse-to-fine; every pass reuses the samples of the coarser
+    # ones, so the total work equals one full render. Yields a preview count
+    # array after each batch (each sample drawn as a stride x stride block);
+    # the last one yielded is the exact image.
+    # evaluate(points) -> counts for an array of pixel coordinates.
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    height, width = len(ys), len(xs)
+    counts = np.zeros((height, width), dtype=np.int64)
+    known = np.zeros((height, width), dtype=bool)
+    preview = np.zeros((height, width), dtype=np.int64)
+
+    for s in strides:
+        rows_per_chunk = max(1, chunk_pixels // len(xs[::s])) * s
+        for y0 in range(0, height, rows_per_chunk):
+            y1 = min(y0 + rows_per_chunk, height)
+            block = counts[y0:y1:s, ::s]
+            todo = ~known[y0:y1:s, ::s]
+            if todo.any():
+                points = complex_grid(xs[::s], ys[y0:y1:s])
+                block[todo] = evaluate(points[todo])
+                known[y0:y1:s, ::s] = True
+
+            if s > 1:
+                block = np.repeat(np.repeat(block, s, axis=0), s, axis=1)
+            preview[y0:y1] = block[:y1 - y0, :width]
+            yield preview
+
+
+def progressive_mandelbrot(
+    xs, ys, max_iter, shortcuts=False, symmetry=False, **kwargs
+):
+    def evaluate(c):
+        return mandelbrot_points(c, max_iter, shortcuts)
+
+    if symmetry:
+        def render(xs, ys):
+            return progressive(evaluate, xs, ys, **kwargs)
+
+        return symmetric_progressive(render, "mandelbrot", None, xs, ys)
+    return progressive(evaluate, xs, ys, **kwargs)
+
+
+def progressive_julia(c, xs, ys, max_iter, symmetry=False, **kwargs):
+    def evaluate(z):
+        return escape_time(z, c, max_iter)
+
+    if symmetry:
+        def render(xs, ys):
+            return progressive(evaluate, xs, ys, **kwargs)
+
+        return symmetric_progressive(render, "julia", c, xs, ys)
+    return progressive(evaluate, xs, ys, **kwargs)
@@ -0,0 +1,174 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# Set to a path prefix to trace a whole run: writes <prefix>.json and
+# <prefix>.chrome.json (open in chrome://tracing or ui.perfetto.dev) at exit
+TRACE_ENV = "FRACTAL_TRACE"
+
+
+class _NullSpan:
+    # Returned while profiling is off, so a disabled span costs one call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.counters = dict(self.profiler.counters)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        p = self.profiler
+        # Counters that moved inside the span are attributed to it
+        now = dict(p.counters)  # copied first: spans may close on other threads
+        delta = {
+            k: v - self.counters.get(k, 0)
+            for k, v in now.items()
+            if v != self.counters.get(k, 0)
+        }
+        p.spans.append({
+            "name": self.name,
+            "start": self.start - p.origin,
+            "duration": end - self.start,
+            "thread": threading.get_ident(),
+            "args": self.args,
+            "counters": delta,
+        })
+        if delta:
+            p.samples.append((end - p.origin, now))
+        return False
+
+
+class Profiler:
+    # Named spans per render stage plus running counters. Everything is a
+    # no-op until enable() is called.
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.samples = []  # (time, counter totals) whenever a span moved them
+        self.counters = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        # name -> calls, total and max seconds
+        stages = {}
+        for s in self.spans:
+            stage = stages.setdefault(
+                s["name"], {"calls": 0, "total": 0.0, "max": 0.0}
+            )
+            stage["calls"] += 1
+            stage["total"] += s["duration"]
+            stage["max"] = max(stage["max"], s["duration"])
+        return stages
+
+    def print_summary(self):
+        print(f"{'stage':<16} {'calls':>7} {'total (s)':>10} {'max (ms)':>9}")
+        stages = sorted(self.summary().items(), key=lambda kv: -kv[1]["total"])
+        for name, st in stages:
+            print(
+                f"{name:<16} {st['calls']:>7} {st['total']:>10.3f}"
+                f" {st['max'] * 1e3:>9.1f}"
+            )
+        for name, value in sorted(self.counters.items()):
+            print(f"{name:<16} {value:>18,}")
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "spans": self.spans,
+                    "counters": self.counters,
+                    "summary": self.summary(),
+                },
+                f,
+                indent=1,
+            )
+
+    def export_chrome_trace(self, path):
+        # Trace Event Format: complete events for spans, counter events for
+        # the running totals; times in microseconds
+        pid = os.getpid()
+        events = []
+        for s in self.spans:
+            events.append({
+                "name": s["name"],
+                "ph": "X",
+                "ts": s["start"] * 1e6,
+                "dur": s["duration"] * 1e6,
+                "pid": pid,
+                "tid": s["thread"],
+                "args": {**s["args"], **s["counters"]},
+            })
+        for t, counters in self.samples:
+            for name, value in counters.items():
+                events.append({
+                    "name": name,
+                    "ph": "C",
+                    "ts": t * 1e6,
+                    "pid": pid,
+                    "args": {name: value},
+                })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, prefix):
+        folder = os.path.dirname(os.path.abspath(prefix))
+        os.makedirs(folder, exist_ok=True)
+        self.export_json(f"{prefix}.json")
+        self.export_chrome_trace(f"{prefix}.chrome.json")
+
+
+PROFILER = Profiler()
+span = PROFILER.span
+count = PROFILER.count
+
+
+def _export_at_exit(prefix):
+    PROFILER.print_summary()
+    PROFILER.export(prefix)
+    print(f"Trace written to {prefix}.json and {prefix}.chrome.json")
+
+
+if os.environ.get(TRACE_ENV):
+    import multiprocessing
+
+    # Worker processes inherit the variable; only the parent traces
+    if multiprocessing.parent_process() is None:
+        PROFILER.enable()
+        atexit.register(_export_at_exit, os.environ[TRACE_ENV])
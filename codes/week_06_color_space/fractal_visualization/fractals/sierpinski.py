@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def sierpinski_levels(points, degree):
+    # Triangles of every level as (3**k, 3, 2) float64 arrays, k = 0 being the
+    # outer triangle. Each level is computed from the previous one in a
+    # single step: every triangle spawns its three corner triangles.
+    triangles = np.asarray(points, dtype=np.float64).reshape(1, 3, 2)
+    levels = []
+    for _ in range(degree):
+        levels.append(triangles)
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+        ab, ac, bc = (a + b) / 2, (a + c) / 2, (b + c) / 2
+        triangles = np.stack(
+            [
+                np.stack([a, ab, ac], axis=1),
+                np.stack([b, ab, bc], axis=1),
+                np.stack([c, bc, ac], axis=1),
+            ],
+            axis=1,
+        ).reshape(-1, 3, 2)
+    return levels
@@ -0,0 +1,115 @@
+import os
+import queue
+import threading
+
+from .profiling import span
+
+
+class FrameSink:
+    # Receives rendered BGR frames; `repeat` asks for the same frame to be
+    # emitted several times in a row (held frames in an animation)
+
+    def write(self, frame, repeat=1):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PngSink(FrameSink):
+    def __init__(self, folder, start=0, step=1):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.cnt = start
+        self.step = step
+
+    def write(self, frame, repeat=1):
+        import cv2
+
+        with span("png_write", frames=repeat):
+            for _ in range(repeat):
+                cv2.imwrite(f"{self.folder}/{self.cnt:04d}.png", frame)
+                self.cnt += self.step
+
+
+class VideoSink(FrameSink):
+    # Encodes on a dedicated thread so rendering the next frame overlaps with
+    # encoding the previous one. The queue is bounded, which keeps memory flat
+    # when the encoder is the slower side.
+
+    def __init__(self, path, fps=15, fourcc="mp4v", queue_size=8):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.frames = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._encode, daemon=True)
+        self._thread.start()
+
+    def _encode(self):
+        import cv2
+
+        video = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, repeat = item
+            if self.error is not None:
+                continue  # keep draining so the producer never blocks
+            try:
+                if video is None:
+                    height, width = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*self.fourcc)
+                    video = cv2.VideoWriter(
+                        self.path, fourcc, self.fps, (width, height)
+                    )
+                    if not video.isOpened():
+                        # A bad path or an unsupported fourcc; VideoWriter
+                        # would silently drop every frame
+                        raise OSError(
+                            f"cannot open {self.path!r} for writing"
+                            f" with fourcc {self.fourcc!r}"
+                        )
+                with span("encode", frames=repeat):
+                    for _ in range(repeat):
+                        video.write(frame)
+                        self.frames += 1
+            except Exception as e:  # reported to the producer on close()
+                self.error = e
+        if video is not None:
+            video.release()
+
+    def write(self, frame, repeat=1):
+        # The frame is queued by reference; callers hand over ownership
+        if self.error is not None:
+            raise self.error
+        with span("queue_wait"):  # time blocked on a full queue
+            self._queue.put((frame, repeat))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+class TeeSink(FrameSink):
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, frame, repeat=1):
+        for sink in self.sinks:
+            sink.write(frame, repeat)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
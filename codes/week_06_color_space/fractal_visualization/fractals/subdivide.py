@@ -0,0 +1,114 @@
+import numpy as np
+
+from .engine import escape_time, mandelbrot_points
+from .symmetry import symmetric_render
+
+# Rectangles smaller than this are evaluated in full instead of being split
+MIN_SIZE = 16
+
+
+def _outline(a, y0, y1, x0, x1):
+    return (a[y0, x0:x1], a[y1 - 1, x0:x1], a[y0:y1, x0], a[y0:y1, x1 - 1])
+
+
+def mariani_silver(evaluate, shape, min_size=MIN_SIZE):
+    # Mandelbrot and Julia sets are connected, so a rectangle whose whole
+    # outline has one iteration count is filled with it without looking
+    # inside. Rectangles are handled a level at a time so every batch of
+    # outline pixels goes through the vectorized engine in one call.
+    # evaluate(flat_indices) -> counts; returns (counts, pixels_evaluated).
+    counts = np.full(shape, -1, dtype=np.int64)
+    todo = np.zeros(shape, dtype=bool)
+    evaluated = 0
+
+    def compute():
+        nonlocal evaluated
+        todo[counts >= 0] = False
+        idx = np.flatnonzero(todo)
+        if idx.size:
+            counts.flat[idx] = evaluate(idx)
+            evaluated += idx.size
+        todo[...] = False
+
+    rects = [(0, shape[0], 0, shape[1])]
+    while rects:
+        for r in rects:
+            for edge in _outline(todo, *r):
+                edge[...] = True
+        compute()
+
+        split = []
+        for y0, y1, x0, x1 in rects:
+            if y1 - y0 <= 2 or x1 - x0 <= 2:
+                continue  # the outline is the whole rectangle
+            value = counts[y0, x0]
+            inside = counts[y0 + 1:y1 - 1, x0 + 1:x1 - 1]
+            edges = _outline(counts, y0, y1, x0, x1)
+            if all((edge == value).all() for edge in edges):
+                inside[inside < 0] = value
+            elif y1 - y0 <= min_size or x1 - x0 <= min_size:
+                todo[y0 + 1:y1 - 1, x0 + 1:x1 - 1] = True
+            else:
+                ym, xm = (y0 + y1) // 2, (x0 + x1) // 2
+                # Children share their outlines with the parent and each other
+                split += [
+                    (y0, ym + 1, x0, xm + 1),
+                    (y0, ym + 1, xm, x1),
+                    (ym, y1, x0, xm + 1),
+                    (ym, y1, xm, x1),
+                ]
+        compute()
+        rects = split
+
+    return counts, evaluated
+
+
+def _symmetric(render, kind, c, xs, ys):
+    # symmetric_render for the (counts, evaluated) renderers below
+    evaluated = 0
+
+    def counted(xs, ys):
+        nonlocal evaluated
+        counts, n = render(xs, ys)
+        evaluated += n
+        return counts
+
+    return symmetric_render(counted, kind, c, xs, ys), evaluated
+
+
+def subdivide_mandelbrot(
+    xs, ys, max_iter, shortcuts=False, min_size=MIN_SIZE, symmetry=False
+):
+    if symmetry:
+        def render(xs, ys):
+            return subdivide_mandelbrot(xs, ys, max_iter, shortcuts, min_size)
+
+        return _symmetric(render, "mandelbrot", None, xs, ys)
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    def evaluate(idx):
+        c = np.empty(idx.size, dtype=np.complex128)
+        c.real = xs[idx % len(xs)]
+        c.imag = ys[idx // len(xs)]
+        return mandelbrot_points(c, max_iter, shortcuts)
+
+    return mariani_silver(evaluate, (len(ys), len(xs)), min_size)
+
+
+def subdivide_julia(c, xs, ys, max_iter, min_size=MIN_SIZE, symmetry=False):
+    if symmetry:
+        def render(xs, ys):
+            return subdivide_julia(c, xs, ys, max_iter, min_size)
+
+        return _symmetric(render, "julia", c, xs, ys)
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    def evaluate(idx):
+        z = np.empty(idx.size, dtype=np.complex128)
+        z.real = xs[idx % len(xs)]
+        z.imag = ys[idx // len(xs)]
+        return escape_time(z, c, max_iter)
+
+    return mariani_silver(evaluate, (len(ys), len(xs)), min_size)
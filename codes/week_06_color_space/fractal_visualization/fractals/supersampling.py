@@ -0,0 +1,231 @@
+import time
+
+import numpy as np
+
+from .engine import escape_time, mandelbrot_points, pick_precision
+from .palettes import colorize
+from .symmetry import fill_symmetric, plan_symmetry
+
+# Edge pixels are re-sampled on an AA_GRID x AA_GRID stratified pattern,
+# jittered inside each cell, and get the mean color of the samples
+AA_GRID = 4
+
+# Neighbouring pixels whose colors differ by more than this (0-255, any
+# channel) mark an edge, and a pixel gets the full pattern only when the
+# colors of its first samples spread by more than this
+AA_CONTRAST = 16
+
+# Jitter of the samples: the R2 low-discrepancy sequence (Roberts, 2018),
+# indexed by seed, pixel and sample. A pixel gets the same pattern whatever
+# batch it is re-sampled in, and numpy.random (~25 ms to import) stays out.
+_R2 = (0.7548776662466927, 0.5698402909980532)
+
+# Sub-pixel samples evaluated per engine call, which bounds the memory of
+# the coordinate and count arrays
+AA_CHUNK = 1 << 20
+
+# Edge pixels handed to supersample() at a time. Under a time budget the
+# first batch is small and the later ones are sized from the measured rate
+# to part of what is left, growing at most AA_GROWTH times per batch, so a
+# slow stretch of edge costs at most one batch of overshoot.
+AA_BATCH = 16384
+AA_FIRST_BATCH = 64
+AA_GROWTH = 2
+
+
+def edge_contrast(img):
+    # Largest color difference (any channel) between each pixel and its 8
+    # neighbours. Each neighbouring pair is compared once and counts for
+    # both of its pixels. Works on contiguous uint8 channel planes, which is
+    # several times faster than a signed (H, W, 3) difference.
+    planes = [np.ascontiguousarray(img[..., k]) for k in range(img.shape[-1])]
+    strength = np.zeros(img.shape[:2], dtype=np.uint8)
+    pairs = (
+        ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),
+        ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),
+        ((slice(1, None), slice(1, None)), (slice(None, -1), slice(None, -1))),
+        ((slice(1, None), slice(None, -1)), (slice(None, -1), slice(1, None))),
+    )
+    for a, b in pairs:
+        differ = None
+        for plane in planes:
+            d = np.maximum(plane[a], plane[b])
+            d -= np.minimum(plane[a], plane[b])
+            differ = d if differ is None else np.maximum(differ, d, out=differ)
+        np.maximum(strength[a], differ, out=strength[a])
+        np.maximum(strength[b], differ, out=strength[b])
+    return strength
+
+
+def edge_mask(img, contrast=AA_CONTRAST):
+    # Pixels whose color visibly differs from a neighbour: the set boundary
+    # and the steps between distant counts. Flat regions and the small
+    # steps of a smooth color ramp keep their single sample.
+    return edge_contrast(img) > contrast
+
+
+def _sample_precision(xs, ys, grid):
+    # Chosen for the sub-pixel spacing, not the pixel spacing
+    return pick_precision(
+        np.linspace(xs[0], xs[-1], grid * len(xs)),
+        np.linspace(ys[0], ys[-1], grid * len(ys)),
+    )
+
+
+def _step(axis):
+    return axis[1] - axis[0] if len(axis) > 1 else 0.0
+
+
+def supersample(
+    kind,
+    c,
+    xs,
+    ys,
+    max_iter,
+    rows,
+    cols,
+    palette="hsv",
+    grid=AA_GRID,
+    shortcuts=True,
+    precision="auto",
+    seed=0,
+    adaptive=True,
+    contrast=AA_CONTRAST,
+):
+    # Mean BGR color (float32, shape (len(rows), 3)) of grid x grid jittered
+    # samples inside each pixel (rows[k], cols[k]). A pixel covers one step
+    # of xs and ys centered on its sample position, so the result stays
+    # registered with the plain render. The jitter only depends on the seed
+    # and the pixel, which keeps every frame of an animation reproducible.
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if precision == "auto":
+        precision = _sample_precision(xs, ys, grid)
+
+    def evaluate(points):
+        if kind == "mandelbrot":
+            return mandelbrot_points(points, max_iter, shortcuts, precision)
+        # shortcuts: cycle detection, which like the bulb test for the
+        # Mandelbrot set only affects samples inside the set
+        return escape_time(
+            points, c, max_iter, periodicity=shortcuts, precision=precision
+        )
+
+    dx, dy = _step(xs), _step(ys)
+    sample = np.arange(grid * grid, dtype=np.float64).reshape(grid, grid)
+    strata = (np.arange(grid) + 0.5) / grid - 0.5
+    # First pass: every other stratum in both directions, one sample per
+    # quadrant. Only pixels whose first colors spread by more than
+    # `contrast` get the remaining strata; adaptive=False takes them all.
+    first = np.zeros((grid, grid), dtype=bool)
+    first[::2, ::2] = True
+    if not adaptive:
+        first[...] = True
+    first = first.ravel()
+    per_chunk = max(1, AA_CHUNK // grid**2)
+    colors = np.empty((len(rows), 3), dtype=np.float32)
+    for start in range(0, len(rows), per_chunk):
+        r = rows[start:start + per_chunk]
+        q = cols[start:start + per_chunk]
+        n = len(r)
+        pixel = (seed * len(ys) + r.astype(np.float64)) * len(xs) + q
+        index = pixel[:, np.newaxis, np.newaxis] * grid**2 + sample
+        u = strata[np.newaxis, np.newaxis, :] + (index * _R2[0] % 1 - 0.5) / grid
+        v = strata[np.newaxis, :, np.newaxis] + (index * _R2[1] % 1 - 0.5) / grid
+        points = (xs[q][:, np.newaxis, np.newaxis] + u * dx) + 1j * (
+            ys[r][:, np.newaxis, np.newaxis] + v * dy
+        )
+        points = points.reshape(n, grid * grid)
+        coarse = colorize(evaluate(points[:, first]), max_iter, palette)
+        colors[start:start + n] = coarse.mean(axis=1, dtype=np.float32)
+        if first.all():
+            continue
+        spread = coarse.max(axis=1).astype(np.int16) - coarse.min(axis=1)
+        more = np.flatnonzero(spread.max(axis=1) > contrast)
+        if more.size:
+            rest = colorize(evaluate(points[more][:, ~first]), max_iter, palette)
+            total = coarse[more].sum(axis=1, dtype=np.float32)
+            total += rest.sum(axis=1, dtype=np.float32)
+            colors[start + more] = total / (grid * grid)
+    return colors
+
+
+def antialias(
+    img,
+    kind,
+    c,
+    xs,
+    ys,
+    max_iter,
+    palette="hsv",
+    grid=AA_GRID,
+    shortcuts=True,
+    precision="auto",
+    seed=0,
+    mask=None,
+    adaptive=True,
+    contrast=AA_CONTRAST,
+    symmetry=False,
+    budget=None,
+):
+    # Adaptive supersampling of a colored render, in place: only the pixels
+    # of `mask` (edge_mask(img, contrast) by default) are re-sampled, every
+    # other pixel keeps its single sample. mask=np.ones(...), adaptive=False
+    # is brute-force supersampling of the whole image. symmetry: re-sample
+    # one half of a symmetric view and mirror it, like the renderers do.
+    # budget: seconds to spend at most; the most contrasted edges go first,
+    # so a run that is cut short fixes the ones that show the most. This
+    # trades quality for time: the edges left over keep their single sample.
+    # Returns the number of pixels re-sampled and of pixels in the mask.
+    t = time.perf_counter()
+    strength = edge_contrast(img)
+    if mask is None:
+        mask = strength > contrast
+    copies = []
+    if symmetry:
+        blocks, copies = plan_symmetry(kind, c, xs, ys)
+        computed = np.zeros_like(mask)
+        for y0, y1, x0, x1 in blocks:
+            computed[y0:y1, x0:x1] = True
+        mask = mask & computed
+    rows, cols = np.nonzero(mask)
+    if budget is not None:
+        order = np.argsort(-strength[rows, cols].astype(np.int16), kind="stable")
+        rows, cols = rows[order], cols[order]
+
+    if precision == "auto":
+        precision = _sample_precision(xs, ys, grid)
+    done = 0
+    sampling = 0.0  # seconds spent in supersample()
+    shortest = 0.0  # fastest supersample() call so far
+    batch = AA_BATCH if budget is None else AA_FIRST_BATCH
+    calls = 0
+    while done < rows.size:
+        if budget is not None:
+            left = budget - (time.perf_counter() - t)
+            # A call costs a fixed part (the max_iter steps of the engine
+            # loop) plus a part per pixel
+            if left <= shortest:
+                break
+            if done:
+                per_pixel = max(sampling - calls * shortest, 0.0) / done
+                room = 0.8 * left - shortest
+                fit = AA_BATCH if per_pixel == 0 else int(room / per_pixel)
+                batch = min(AA_BATCH, AA_GROWTH * batch, fit)
+            if batch < 1:
+                break
+        r = rows[done:done + batch]
+        q = cols[done:done + batch]
+        started = time.perf_counter()
+        colors = supersample(
+            kind, c, xs, ys, max_iter, r, q, palette, grid, shortcuts,
+            precision, seed, adaptive, contrast,
+        )
+        img[r, q] = np.rint(colors).astype(np.uint8)
+        took = time.perf_counter() - started
+        shortest = took if not calls else min(shortest, took)
+        sampling += took
+        done += r.size
+        calls += 1
+    fill_symmetric(img, copies)
+    return done, rows.size
@@ -0,0 +1,142 @@
+import numpy as np
+
+# Symmetries of the escape-time sets, as (negate x, negate y):
+#   the Mandelbrot set is mirrored by the real axis, c -> conj(c);
+#   every Julia set is point symmetric, z -> -z (f(-z) == f(z));
+#   a Julia set of a real c is mirrored by both axes.
+# Negation is exact in floating point, so a mirrored pixel gets bit for bit
+# the count its own coordinate would have produced.
+CONJUGATE = (False, True)
+MIRROR_X = (True, False)
+POINT = (True, True)
+
+# Pixel pairs are reused when their coordinates mirror each other within
+# this fraction of a pixel step
+MIRROR_TOLERANCE = 1e-6
+
+
+def symmetries(kind, c=None):
+    if kind == "mandelbrot":
+        return [CONJUGATE]
+    if c is not None and complex(c).imag == 0:
+        return [CONJUGATE, MIRROR_X]
+    return [POINT]
+
+
+def mirror_offset(axis):
+    # k such that axis[k - i] == -axis[i] for every pair inside the axis, or
+    # None when the samples are not placed symmetrically around 0. With
+    # linspace(-a, a, n) k is n - 1; with linear_axis(-a, a, n) (end point
+    # excluded) it is n, and the first sample has no mirror image.
+    axis = np.asarray(axis, dtype=np.float64)
+    n = len(axis)
+    if n < 2:
+        return 0 if n == 1 and axis[0] == 0 else None
+    step = (axis[-1] - axis[0]) / (n - 1)
+    if step == 0:
+        return None
+    k = int(round(-2 * axis[0] / step))
+    i = np.arange(max(0, k - n + 1), min(n - 1, k) + 1)
+    if i.size == 0:
+        return None
+    if np.abs(axis[i] + axis[k - i]).max() > MIRROR_TOLERANCE * abs(step):
+        return None
+    return k
+
+
+def _overlap(start, stop, k):
+    # Indices of [start, stop) whose mirror k - i also lies in [start, stop)
+    return max(start, k - stop + 1), min(stop - 1, k) + 1
+
+
+def _split(block, flips, offsets):
+    # One symmetry applied to one block (y0, y1, x0, x1): the blocks still
+    # to compute and the copies that fill the rest. The halved axis is y
+    # unless only x is negated.
+    negate = (flips[1], flips[0])  # per axis: y, x
+    a = 0 if negate[0] else 1
+    b = 1 - a
+    ranges = [block[0:2], block[2:4]]
+    k = offsets[a]
+    lo, hi = _overlap(*ranges[a], k)
+    f0, f1 = max(lo, k // 2 + 1), hi  # filled: the half above k / 2
+    if f0 >= f1:
+        return [block], []
+    fill_b = src_b = ranges[b]
+    keep_b = []
+    if negate[b]:
+        # Point symmetry: only pixels whose rotated image is inside the block
+        kb = offsets[b]
+        lb, hb = _overlap(*ranges[b], kb)
+        if lb >= hb:
+            return [block], []
+        fill_b, src_b = (lb, hb), (kb - hb + 1, kb - lb + 1)
+        keep_b = [(ranges[b][0], lb), (hb, ranges[b][1])]
+
+    def rect(ra, rb):
+        return (*ra, *rb) if a == 0 else (*rb, *ra)
+
+    compute = [
+        rect((ranges[a][0], f0), ranges[b]),
+        rect((f1, ranges[a][1]), ranges[b]),
+    ] + [rect((f0, f1), r) for r in keep_b]
+    compute = [r for r in compute if r[0] < r[1] and r[2] < r[3]]
+    src = rect((k - f1 + 1, k - f0 + 1), src_b)
+    return compute, [(rect((f0, f1), fill_b), src, flips)]
+
+
+def plan_symmetry(kind, c, xs, ys):
+    # Blocks (y0, y1, x0, x1) that have to be computed, and the copies that
+    # complete the image from them (see fill_symmetric). Off-center views
+    # only save the part that overlaps its mirror image; views whose pixels
+    # do not land on mirrored positions are computed in full.
+    shape = (len(ys), len(xs))
+    offsets = (mirror_offset(ys), mirror_offset(xs))
+    blocks = [(0, shape[0], 0, shape[1])]
+    copies = []
+    for flips in symmetries(kind, c):
+        if (flips[0] and offsets[1] is None) or (flips[1] and offsets[0] is None):
+            continue
+        split = []
+        for block in blocks:
+            compute, filled = _split(block, flips, offsets)
+            split += compute
+            copies += filled
+        blocks = split
+    return blocks, copies
+
+
+def fill_symmetric(counts, copies):
+    # Later symmetries read blocks that the earlier ones fill, so copies are
+    # applied last to first
+    for (y0, y1, x0, x1), (v0, v1, u0, u1), (flip_x, flip_y) in reversed(copies):
+        src = counts[v0:v1, u0:u1]
+        if flip_y:
+            src = src[::-1]
+        if flip_x:
+            src = src[:, ::-1]
+        counts[y0:y1, x0:x1] = src
+    return counts
+
+
+def symmetric_render(render, kind, c, xs, ys):
+    # render(xs, ys) -> counts, any of the full-frame renderers
+    blocks, copies = plan_symmetry(kind, c, xs, ys)
+    counts = None
+    for y0, y1, x0, x1 in blocks:
+        part = render(xs[x0:x1], ys[y0:y1])
+        if counts is None:
+            counts = np.zeros((len(ys), len(xs)), dtype=part.dtype)
+        counts[y0:y1, x0:x1] = part
+    return fill_symmetric(counts, copies)
+
+
+def symmetric_progressive(progressive, kind, c, xs, ys):
+    # progressive(xs, ys) -> generator of previews; the blocks are refined
+    # one after the other and every preview shows the mirrored result
+    blocks, copies = plan_symmetry(kind, c, xs, ys)
+    counts = np.zeros((len(ys), len(xs)), dtype=np.int64)
+    for y0, y1, x0, x1 in blocks:
+        for preview in progressive(xs[x0:x1], ys[y0:y1]):
+            counts[y0:y1, x0:x1] = preview
+            yield fill_symmetric(counts, copies)
@@ -0,0 +1,95 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .engine import count_dtype, julia_grid, mandelbrot_grid
+
+# Small tiles keep the pool busy: tiles on the set boundary cost far more than
+# exterior ones, and idle workers simply pull the next tile from the queue.
+TILE_SIZE = 64
+
+_pools = {}
+
+
+def get_pool(workers):
+    # One pool per worker count, reused across frames of an animation
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+@atexit.register
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+def iter_tiles(height, width, tile_size=TILE_SIZE):
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            yield y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width)
+
+
+def _render_tile(
+    shm_name, shape, kind, c, xs, ys, max_iter, tile, shortcuts, precision
+):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        counts = np.ndarray(shape, dtype=count_dtype(max_iter), buffer=shm.buf)
+        y0, y1, x0, x1 = tile
+        if kind == "mandelbrot":
+            counts[y0:y1, x0:x1] = mandelbrot_grid(
+                xs, ys, max_iter, shortcuts=shortcuts, precision=precision
+            )
+        else:
+            counts[y0:y1, x0:x1] = julia_grid(
+                c, xs, ys, max_iter, precision=precision
+            )
+    finally:
+        shm.close()
+    return tile
+
+
+def render_tiled(
+    kind,
+    c,
+    xs,
+    ys,
+    max_iter,
+    workers=None,
+    tile_size=TILE_SIZE,
+    shortcuts=False,
+    precision="float64",
+):
+    # Workers write iteration counts straight into a shared framebuffer, so
+    # only tile coordinates travel back through the pool
+    workers = workers or os.cpu_count()
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    shape = (len(ys), len(xs))
+
+    dtype = count_dtype(max_iter)
+    nbytes = max(1, shape[0] * shape[1] * dtype.itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        pool = get_pool(workers)
+        futures = [
+            pool.submit(
+                _render_tile, shm.name, shape, kind, c,
+                xs[x0:x1], ys[y0:y1], max_iter, (y0, y1, x0, x1), shortcuts,
+                precision,
+            )
+            for y0, y1, x0, x1 in iter_tiles(*shape, tile_size)
+        ]
+        wait(futures)
+        for future in futures:
+            future.result()
+        counts = np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return counts